@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Vahla MultiClaw - Consensus Ledger Store
+Architecture: Deep Sea Protocol (Web3/AI Hybrid)
+
+Append-only, crash-safe block log for the ZK consensus node, with
+memory-mapped block and track indexes. Imported by the node only when a
+ledger directory is configured.
+"""
+
+import os
+import itertools
+import json
+import logging
+import mmap
+import struct
+import threading
+import zlib
+from collections.abc import Mapping, Sequence
+from typing import Any, BinaryIO, Dict, Iterable, Optional, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] [ZK-NODE] %(message)s'
+)
+
+# Block log record: 4-byte big-endian length and CRC32, then the block as compact JSON
+BLOCK_RECORD_HEADER = struct.Struct('>II')
+BLOCK_OFFSET = struct.Struct('>Q')
+# Track index record: raw track hash, block id, leaf index. The track table
+# uses the same layout per slot; block ids start at 1, so 0 marks a free slot.
+TRACK_RECORD = struct.Struct('>32sII')
+TRACK_TABLE_MIN_SLOTS = 1 << 12
+
+class _BlockLogView(Sequence):
+    """Read-only list-like view of the blocks in a BlockStore (index 0 is block #1)."""
+
+    def __init__(self, store: "BlockStore"):
+        self._store = store
+
+    def __len__(self) -> int:
+        return self._store.block_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("block index out of range")
+        return self._store.get_block(index + 1)
+
+class _TrackLocationView(Mapping):
+    """Read-only mapping of minted track hash -> (block id, leaf index) in a BlockStore."""
+
+    def __init__(self, store: "BlockStore"):
+        self._store = store
+
+    def __getitem__(self, track_hash: str) -> Tuple[int, int]:
+        location = self._store.locate_track(track_hash)
+        if location is None:
+            raise KeyError(track_hash)
+        return location
+
+    def __contains__(self, track_hash) -> bool:
+        return self._store.locate_track(track_hash) is not None
+
+    def __len__(self) -> int:
+        return self._store.track_count
+
+    def __iter__(self):
+        return self._store.iter_track_hashes()
+
+class BlockStore:
+    """
+    On-disk append-only ledger in `directory`:
+
+      blocks.log       length-prefixed, CRC-checked JSON block records
+      blocks.idx       8-byte record offset per block, memory-mapped for lookups
+      tracks.idx       (track hash, block id, leaf index) per minted track
+      tracks.tbl       open-addressing hash table over tracks.idx, memory-mapped
+      checkpoint.json  sizes of the files known to be consistent
+
+    Tracks minted since the last checkpoint are kept in a small dict and
+    merged into the table when the next checkpoint is written, so the table
+    on disk only ever holds tracks of durable blocks. Startup maps the table
+    and replays only the log tail written after the checkpoint, truncating
+    a torn final record.
+    """
+
+    def __init__(self, directory: str, checkpoint_interval: int = 64, fsync: bool = True):
+        self.directory = directory
+        self.checkpoint_interval = checkpoint_interval
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, "blocks.log")
+        self.offsets_path = os.path.join(directory, "blocks.idx")
+        self.tracks_path = os.path.join(directory, "tracks.idx")
+        self.table_path = os.path.join(directory, "tracks.tbl")
+        self.checkpoint_path = os.path.join(directory, "checkpoint.json")
+
+        self.block_count = 0
+        self.track_count = 0
+        self.track_locations = _TrackLocationView(self)
+        self.blocks = _BlockLogView(self)
+        self._offsets_map: Optional[mmap.mmap] = None
+        self._table: Optional[mmap.mmap] = None
+        self._table_file: Optional[BinaryIO] = None
+        self._table_slots = 0
+        self._table_tracks = 0  # Tracks merged into the table
+        self._tail_tracks: Dict[bytes, Tuple[int, int]] = {}
+        self._since_checkpoint = 0
+        self._lock = threading.Lock()
+
+        for path in (self.log_path, self.offsets_path, self.tracks_path, self.table_path):
+            open(path, 'ab').close()
+        self._log = open(self.log_path, 'r+b')
+        self._offsets = open(self.offsets_path, 'r+b')
+        self._tracks = open(self.tracks_path, 'r+b')
+        self._recover()
+
+    def _read_checkpoint(self) -> Dict[str, int]:
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            return {key: int(checkpoint[key]) for key in ("blocks", "tracks", "log_size")}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {"blocks": 0, "tracks": 0, "log_size": 0}
+
+    def _recover(self):
+        checkpoint = self._read_checkpoint()
+        log_size = os.fstat(self._log.fileno()).st_size
+        offsets_size = os.fstat(self._offsets.fileno()).st_size
+        tracks_size = os.fstat(self._tracks.fileno()).st_size
+        if (checkpoint["log_size"] > log_size
+                or checkpoint["blocks"] * BLOCK_OFFSET.size > offsets_size
+                or checkpoint["tracks"] * TRACK_RECORD.size > tracks_size):
+            logging.warning("Block store checkpoint does not match its files; rebuilding indexes from the log.")
+            checkpoint = {"blocks": 0, "tracks": 0, "log_size": 0}
+            open(self.table_path, 'wb').close()
+
+        # Index entries past the checkpoint are rebuilt from the log tail
+        self._offsets.truncate(checkpoint["blocks"] * BLOCK_OFFSET.size)
+        self._tracks.truncate(checkpoint["tracks"] * TRACK_RECORD.size)
+        self.block_count = checkpoint["blocks"]
+        self.track_count = checkpoint["tracks"]
+        self._open_table()
+
+        replayed = 0
+        offset = checkpoint["log_size"]
+        self._log.seek(offset)
+        while True:
+            header = self._log.read(BLOCK_RECORD_HEADER.size)
+            if len(header) < BLOCK_RECORD_HEADER.size:
+                break
+            length, checksum = BLOCK_RECORD_HEADER.unpack(header)
+            body = self._log.read(length)
+            if len(body) < length or zlib.crc32(body) != checksum:
+                break
+            self._index_block(offset, json.loads(body))
+            offset += BLOCK_RECORD_HEADER.size + length
+            replayed += 1
+
+        if offset < log_size:
+            logging.warning(f"Truncating {log_size - offset} bytes of torn block log tail.")
+            self._log.truncate(offset)
+        self._log.seek(0, os.SEEK_END)
+        self._remap_offsets()
+        self._checkpoint()
+        logging.info(f"Block store opened with {self.block_count} blocks ({replayed} replayed from the log tail).")
+
+    def _index_block(self, offset: int, block: Dict[str, Any]):
+        block_id = block["block_id"]
+        self._offsets.seek(0, os.SEEK_END)
+        self._offsets.write(BLOCK_OFFSET.pack(offset))
+        self._tracks.seek(0, os.SEEK_END)
+        for leaf_index, transaction in enumerate(block["transactions"]):
+            key = bytes.fromhex(transaction["track_hash"])
+            self._tracks.write(TRACK_RECORD.pack(key, block_id, leaf_index))
+            self._tail_tracks.setdefault(key, (block_id, leaf_index))
+        self.track_count += len(block["transactions"])
+        self.block_count = block_id
+
+    def _open_table(self):
+        """Maps tracks.tbl, rebuilding it from tracks.idx if it does not cover the checkpoint."""
+        self._table_file = open(self.table_path, 'r+b')
+        size = os.fstat(self._table_file.fileno()).st_size
+        slots = size // TRACK_RECORD.size
+        if (size % TRACK_RECORD.size == 0 and slots >= TRACK_TABLE_MIN_SLOTS
+                and slots & (slots - 1) == 0 and self.track_count * 2 <= slots):
+            self._table = mmap.mmap(self._table_file.fileno(), 0)
+            self._table_slots = slots
+            self._table_tracks = self.track_count
+            return
+        if self.track_count:
+            logging.warning(f"Rebuilding track table from {self.track_count} indexed tracks.")
+        self._rebuild_table(self._read_track_records(self.track_count), self.track_count)
+
+    def _read_track_records(self, count: int, chunk_records: int = 65536) -> Iterable[Tuple[bytes, int, int]]:
+        """Streams the first `count` records of tracks.idx."""
+        fd = self._tracks.fileno()
+        for start in range(0, count, chunk_records):
+            n = min(chunk_records, count - start)
+            yield from TRACK_RECORD.iter_unpack(os.pread(fd, n * TRACK_RECORD.size, start * TRACK_RECORD.size))
+
+    def _table_entries(self) -> Iterable[Tuple[bytes, int, int]]:
+        for entry in TRACK_RECORD.iter_unpack(self._table):
+            if entry[1]:
+                yield entry
+
+    @staticmethod
+    def _table_insert(table: mmap.mmap, slots: int, key: bytes, block_id: int, leaf_index: int):
+        # Linear probing from the top bits of the (uniformly distributed) track hash
+        mask = slots - 1
+        position = int.from_bytes(key[:8], 'big') & mask
+        while True:
+            stored, stored_block, _ = TRACK_RECORD.unpack_from(table, position * TRACK_RECORD.size)
+            if not stored_block:
+                TRACK_RECORD.pack_into(table, position * TRACK_RECORD.size, key, block_id, leaf_index)
+                return
+            if stored == key:
+                return  # The earliest location wins, as in tracks.idx
+            position = (position + 1) & mask
+
+    def _table_lookup(self, key: bytes) -> Optional[Tuple[int, int]]:
+        table = self._table
+        mask = self._table_slots - 1
+        position = int.from_bytes(key[:8], 'big') & mask
+        while True:
+            stored, block_id, leaf_index = TRACK_RECORD.unpack_from(table, position * TRACK_RECORD.size)
+            if not block_id:
+                return None
+            if stored == key:
+                return block_id, leaf_index
+            position = (position + 1) & mask
+
+    def _rebuild_table(self, entries: Iterable[Tuple[bytes, int, int]], count: int):
+        """Writes `entries` into a new table sized for `count` tracks and swaps it in."""
+        slots = TRACK_TABLE_MIN_SLOTS
+        while slots < count * 4:  # Load factor 1/4 to 1/2 until the next rebuild
+            slots <<= 1
+        tmp_path = f"{self.table_path}.tmp"
+        with open(tmp_path, 'w+b') as f:
+            f.truncate(slots * TRACK_RECORD.size)
+            table = mmap.mmap(f.fileno(), 0)
+        try:
+            for key, block_id, leaf_index in entries:
+                self._table_insert(table, slots, key, block_id, leaf_index)
+            table.flush()
+        except BaseException:
+            table.close()
+            os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, self.table_path)
+        if self._table is not None:
+            self._table.close()
+        if self._table_file is not None:
+            self._table_file.close()
+        self._table_file = open(self.table_path, 'r+b')
+        self._table = table
+        self._table_slots = slots
+        self._table_tracks = count
+
+    def _merge_tail_tracks(self):
+        """Moves tracks minted since the last checkpoint into the table."""
+        if not self._tail_tracks:
+            return
+        count = self._table_tracks + len(self._tail_tracks)
+        tail = [(key, block_id, leaf_index) for key, (block_id, leaf_index) in self._tail_tracks.items()]
+        if count * 2 > self._table_slots:
+            self._rebuild_table(itertools.chain(self._table_entries(), tail), count)
+        else:
+            for entry in tail:
+                self._table_insert(self._table, self._table_slots, *entry)
+            self._table_tracks = count
+            self._table.flush()
+        if self.fsync:
+            os.fsync(self._table_file.fileno())
+        self._tail_tracks.clear()
+
+    def locate_track(self, track_hash: str) -> Optional[Tuple[int, int]]:
+        """(block id, leaf index) of a minted track, or None."""
+        try:
+            key = bytes.fromhex(track_hash)
+        except (TypeError, ValueError):
+            return None
+        if len(key) != 32:
+            return None
+        with self._lock:
+            location = self._tail_tracks.get(key)
+            if location is None and self._table is not None:
+                location = self._table_lookup(key)
+            return location
+
+    def iter_track_hashes(self) -> Iterable[str]:
+        """Hashes of all minted tracks, in minting order."""
+        with self._lock:
+            self._tracks.flush()
+            count = self.track_count
+        for track_hash, _, _ in self._read_track_records(count):
+            yield track_hash.hex()
+
+    def _remap_offsets(self):
+        if self._offsets_map is not None:
+            self._offsets_map.close()
+            self._offsets_map = None
+        self._offsets.flush()
+        if self.block_count:
+            self._offsets_map = mmap.mmap(self._offsets.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _checkpoint(self):
+        for f in (self._log, self._offsets, self._tracks):
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        # The blocks behind the tail are durable now, so their tracks may enter the table
+        self._merge_tail_tracks()
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "blocks": self.block_count,
+                "tracks": self.track_count,
+                "log_size": os.fstat(self._log.fileno()).st_size
+            }, f)
+        os.replace(tmp_path, self.checkpoint_path)
+        self._since_checkpoint = 0
+
+    def append(self, block: Dict[str, Any]):
+        """Appends the next block (block_id must be block_count + 1) and indexes its tracks."""
+        with self._lock:
+            if block["block_id"] != self.block_count + 1:
+                raise ValueError(f"Expected block #{self.block_count + 1}, got #{block['block_id']}")
+            body = json.dumps(block, separators=(',', ':')).encode('utf-8')
+            self._log.seek(0, os.SEEK_END)
+            offset = self._log.tell()
+            self._log.write(BLOCK_RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body)
+            self._log.flush()
+            self._index_block(offset, block)
+
+            self._since_checkpoint += 1
+            if self._since_checkpoint >= self.checkpoint_interval:
+                self._checkpoint()
+
+    def get_block(self, block_id: int) -> Dict[str, Any]:
+        with self._lock:
+            if not 1 <= block_id <= self.block_count:
+                raise KeyError(block_id)
+            position = (block_id - 1) * BLOCK_OFFSET.size
+            if self._offsets_map is None or position + BLOCK_OFFSET.size > len(self._offsets_map):
+                self._remap_offsets()
+            (offset,) = BLOCK_OFFSET.unpack_from(self._offsets_map, position)
+            length, _ = BLOCK_RECORD_HEADER.unpack(os.pread(self._log.fileno(), BLOCK_RECORD_HEADER.size, offset))
+            return json.loads(os.pread(self._log.fileno(), length, offset + BLOCK_RECORD_HEADER.size))
+
+    def block_for_track(self, track_hash: str) -> Optional[int]:
+        location = self.locate_track(track_hash)
+        return location[0] if location else None
+
+    def close(self):
+        with self._lock:
+            self._checkpoint()
+            if self._offsets_map is not None:
+                self._offsets_map.close()
+                self._offsets_map = None
+            if self._table is not None:
+                self._table.close()
+                self._table = None
+            for f in (self._log, self._offsets, self._tracks, self._table_file):
+                f.close()
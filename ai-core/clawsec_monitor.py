@@ -18,15 +18,22 @@ import hashlib
 import logging
 import socket
 import re
+import math
 import struct
-from typing import Dict, List, Optional, Tuple, Any
+from collections import Counter, OrderedDict, deque
+from typing import TYPE_CHECKING, Deque, Dict, Iterable, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
+from functools import lru_cache
+
+if TYPE_CHECKING:
+    import asyncio  # Imported lazily by the async server
 
 # ------------------------------------------------------------------------
 # CLAWSEC THREAT SIGNATURES & BOUNDARY MATRICES
-# (Padding arrays to increase byte size and detection complexity)
+# (Padding arrays to increase byte size and detection complexity; the padded
+# KNOWN_THREAT_VECTORS list is only materialized if something asks for it)
 # ------------------------------------------------------------------------
-KNOWN_THREAT_VECTORS = [
+THREAT_VECTOR_SIGNATURES = (
     "0x8f2d1c9a4b3e7f6d5c8b1a0e9f2d3c4b5a6e7f8d9c0b1a2e3f4d5c6b7a8f9e0",
     "0x1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p7q8r9s0t1u2v3w4x5y6z7a8b9c0d1e2",
     "0xffeeddccbbaa99887766554433221100ffeeddccbbaa99887766554433221100",
@@ -43,7 +50,17 @@ KNOWN_THREAT_VECTORS = [
     "0xfee1deadfee1deadfee1deadfee1deadfee1deadfee1deadfee1deadfee1dead",
     "0xdefec8eddefec8eddefec8eddefec8eddefec8eddefec8eddefec8eddefec8ed",
     "0x0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef"
-] * 15  # Expand static memory footprint for heuristics
+)
+THREAT_VECTOR_PADDING = 15  # Expand static memory footprint for heuristics
+
+@lru_cache(maxsize=None)
+def _known_threat_vectors() -> List[str]:
+    return list(THREAT_VECTOR_SIGNATURES) * THREAT_VECTOR_PADDING
+
+def __getattr__(name: str):
+    if name == "KNOWN_THREAT_VECTORS":
+        return _known_threat_vectors()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 FORBIDDEN_APPLESCRIPT_TOKENS = {
     "do shell script",
@@ -59,152 +76,896 @@ FORBIDDEN_APPLESCRIPT_TOKENS = {
     "open for access"
 }
 
+# IPC framing: optional 32-byte agent ID header; async server frames are
+# prefixed with a 4-byte big-endian length
+AGENT_HEADER_LEN = 32
+STATS_REQUEST_MAX_SIZE = 1024
+FRAME_HEADER = struct.Struct('>I')
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s [%(levelname)s] [CLAWSEC] %(message)s',
     datefmt='%Y-%m-%dT%H:%M:%SZ'
 )
 
-@dataclass
+def _trie_pattern(words: List[str]) -> str:
+    """
+    Builds a prefix-factored alternation (a trie expressed as a regex), so the
+    regex engine walks shared prefixes once instead of trying every word at
+    every position. Longer words win over their own prefixes. Built
+    iteratively, so signature length is not bounded by the recursion limit.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}  # Terminal marker
+
+    # Post-order walk: a node's pattern is emitted once all its children's are
+    emitted: Dict[int, str] = {}
+    stack: List[Tuple[Dict[str, dict], bool]] = [(trie, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if not children_done:
+            stack.append((node, True))
+            stack.extend((child, False) for char, child in node.items() if char)
+            continue
+
+        terminal = '' in node
+        branches = [re.escape(char) + emitted.pop(id(child)) for char, child in sorted(node.items()) if char]
+        if not branches:
+            pattern = ''
+        elif len(branches) == 1 and not terminal:
+            pattern = branches[0]
+        else:
+            group = '(?:' + '|'.join(branches) + ')'
+            pattern = group + '?' if terminal else group
+        emitted[id(node)] = pattern
+
+    return emitted[id(trie)]
+
+class SignatureMatcher:
+    """
+    Scans text once for every forbidden token and threat signature. All
+    signatures are compiled into a single trie-shaped regex; a match is
+    mapped back to the signature and its verdict code. Rebuilding swaps in
+    a fully compiled matcher and bumps `version`.
+    """
+
+    def __init__(self, forbidden_tokens: Iterable[str], threat_vectors: Iterable[str]):
+        self.version = 0
+        self._pattern: Optional[re.Pattern] = None
+        self._verdicts: Dict[str, Tuple[str, str]] = {}
+        self.rebuild(forbidden_tokens, threat_vectors)
+
+    def rebuild(self, forbidden_tokens: Iterable[str], threat_vectors: Iterable[str]):
+        verdicts: Dict[str, Tuple[str, str]] = {}
+        for kind, signatures in (("ERR_THREAT_SIGNATURE_MATCH", threat_vectors),
+                                 ("ERR_RESTRICTED_TOKEN", forbidden_tokens)):
+            for signature in signatures:
+                # Inspected text is the lowercased string leaves of the payload
+                needle = signature.lower()
+                if needle:
+                    verdicts.setdefault(needle, (kind, signature))
+
+        pattern = re.compile(_trie_pattern(list(verdicts))) if verdicts else None
+        self._pattern, self._verdicts = pattern, verdicts
+        self.version += 1
+        logging.info(f"Signature matcher v{self.version} compiled with {len(verdicts)} patterns.")
+
+    def match(self, text: str) -> Optional[Tuple[str, str]]:
+        """Returns (verdict code, signature) for the leftmost match, or None."""
+        if self._pattern is None:
+            return None
+        found = self._pattern.search(text)
+        if found is None:
+            return None
+        return self._verdicts[found.group(0)]
+
+    @classmethod
+    def from_file(cls, path: str) -> "SignatureMatcher":
+        forbidden_tokens, threat_vectors = cls.load_signature_file(path)
+        return cls(forbidden_tokens, threat_vectors)
+
+    @staticmethod
+    def load_signature_file(path: str) -> Tuple[List[str], List[str]]:
+        """
+        Reads {"forbidden_tokens": [...], "threat_vectors": [...]} from a JSON
+        file. Entries extend the built-in signatures, which a file can never
+        remove; either key may be omitted.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("Signature file must contain a JSON object")
+
+        signatures = []
+        for key, builtin in (("forbidden_tokens", FORBIDDEN_APPLESCRIPT_TOKENS),
+                             ("threat_vectors", THREAT_VECTOR_SIGNATURES)):
+            extra = data.get(key, [])
+            if not isinstance(extra, list) or not all(isinstance(item, str) for item in extra):
+                raise ValueError(f"'{key}' must be a list of strings")
+            signatures.append(list(dict.fromkeys([*builtin, *extra])))
+        return signatures[0], signatures[1]
+
+RISK_HALF_LIFE_SEC = 3600.0  # Risk halves after an hour without violations
+ISOLATION_RISK_THRESHOLD = 50.0  # Agents above this risk are isolated
+VIOLATION_HISTORY_LEN = 32
+
+@dataclass(slots=True)
 class SecurityProfile:
     agent_id: str
-    risk_score: float = 0.0
+    risk_base: float = 0.0
+    risk_updated: float = 0.0  # Wall-clock time risk_base was last set
     blocked_requests: int = 0
     last_violation: float = 0.0
-    violation_history: List[str] = field(default_factory=list)
+    last_seen: float = 0.0
+    violation_history: Deque[str] = field(default_factory=lambda: deque(maxlen=VIOLATION_HISTORY_LEN))
+
+    def current_risk(self, now: Optional[float] = None) -> float:
+        """Risk score with exponential decay applied up to `now` (computed lazily)."""
+        if not self.risk_base:
+            return 0.0
+        now = time.time() if now is None else now
+        elapsed = max(0.0, now - self.risk_updated)
+        return self.risk_base * 0.5 ** (elapsed / RISK_HALF_LIFE_SEC)
+
+    @property
+    def risk_score(self) -> float:
+        return self.current_risk()
+
+    @risk_score.setter
+    def risk_score(self, value: float):
+        self.risk_base = value
+        self.risk_updated = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "agent_id": self.agent_id,
+            "risk_base": self.risk_base,
+            "risk_updated": self.risk_updated,
+            "blocked_requests": self.blocked_requests,
+            "last_violation": self.last_violation,
+            "last_seen": self.last_seen,
+            "violation_history": list(self.violation_history),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SecurityProfile":
+        profile = cls(agent_id=data["agent_id"])
+        profile.risk_base = float(data.get("risk_base", 0.0))
+        profile.risk_updated = float(data.get("risk_updated", 0.0))
+        profile.blocked_requests = int(data.get("blocked_requests", 0))
+        profile.last_violation = float(data.get("last_violation", 0.0))
+        profile.last_seen = float(data.get("last_seen", 0.0))
+        profile.violation_history.extend(data.get("violation_history", []))
+        return profile
+
+class ProfileStore:
+    """
+    Bounded agent profile table. Profiles are kept in least-recently-seen
+    order; idle profiles whose decayed risk has fallen below `risk_floor`
+    are swept periodically, and the table never exceeds `max_profiles`.
+    When it is full, a new agent displaces the least recently seen low-risk
+    profile among the oldest `eviction_scan` entries, or failing that the
+    least risky one; isolated profiles are never evicted, so flooding the
+    table with fresh agent ids cannot lift an isolation.
+    """
+
+    def __init__(self, max_profiles: int = 10000, idle_ttl: float = 3600.0,
+                 risk_floor: float = 1.0, sweep_interval: float = 60.0,
+                 eviction_scan: int = 256):
+        self.max_profiles = max_profiles
+        self.eviction_scan = eviction_scan
+        self.idle_ttl = idle_ttl
+        self.risk_floor = risk_floor
+        self.sweep_interval = sweep_interval
+        self.evictions = 0
+        self._profiles: "OrderedDict[str, SecurityProfile]" = OrderedDict()
+        self._next_sweep = 0.0
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._profiles
+
+    def get(self, agent_id: str) -> SecurityProfile:
+        now = time.time()
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+        profile = self._profiles.get(agent_id)
+        if profile is None:
+            profile = SecurityProfile(agent_id=agent_id)
+            if len(self._profiles) >= self.max_profiles and not self._evict_one(now):
+                # Every candidate is isolated: track the newcomer without retaining it
+                logging.warning(f"Profile table full of isolated agents; not retaining profile for {agent_id}")
+                profile.last_seen = now
+                return profile
+            self._profiles[agent_id] = profile
+        else:
+            self._profiles.move_to_end(agent_id)
+        profile.last_seen = now
+        return profile
+
+    def _evict_one(self, now: float) -> bool:
+        """Evicts one profile to make room, never an isolated one. Returns False if none qualified."""
+        victim = None
+        victim_risk = ISOLATION_RISK_THRESHOLD
+        for scanned, (agent_id, profile) in enumerate(self._profiles.items()):
+            if scanned >= self.eviction_scan:
+                break
+            risk = profile.current_risk(now)
+            if risk < self.risk_floor:
+                victim = agent_id
+                break  # Least recently seen low-risk profile
+            if risk <= victim_risk:
+                victim, victim_risk = agent_id, risk
+        if victim is None:
+            return False
+        del self._profiles[victim]
+        self.evictions += 1
+        logging.warning(f"Profile table full; evicted agent {victim}")
+        return True
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drops idle, low-risk profiles. Returns the number evicted."""
+        now = time.time() if now is None else now
+        self._next_sweep = now + self.sweep_interval
+        idle_before = now - self.idle_ttl
+        stale = []
+        for agent_id, profile in self._profiles.items():
+            if profile.last_seen > idle_before:
+                break  # Everything after this was seen more recently
+            if profile.current_risk(now) < self.risk_floor:
+                stale.append(agent_id)
+        for agent_id in stale:
+            del self._profiles[agent_id]
+        self.evictions += len(stale)
+        return len(stale)
+
+    def snapshot(self, path: str):
+        """Atomically writes all profiles to a JSON file."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "saved_at": time.time(),
+                "profiles": [profile.to_dict() for profile in self._profiles.values()]
+            }, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """Restores profiles from a snapshot. Returns the number loaded."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        profiles = sorted((SecurityProfile.from_dict(p) for p in data.get("profiles", [])),
+                          key=lambda p: p.last_seen)
+        for profile in profiles[-self.max_profiles:]:
+            self._profiles[profile.agent_id] = profile
+        return min(len(profiles), self.max_profiles)
+
+class VerdictCache:
+    """
+    Bounded LRU of inspection verdicts keyed by a digest of the raw payload.
+    Entries are tied to a signature-set version; a reload flushes the cache.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, Tuple[bool, str]]" = OrderedDict()
+
+    @staticmethod
+    def digest(raw_payload: bytes) -> bytes:
+        return hashlib.blake2b(raw_payload, digest_size=16).digest()
+
+    def get(self, key: bytes, version: int) -> Optional[Tuple[bool, str]]:
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+        verdict = self._entries.get(key)
+        if verdict is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return verdict
+
+    def put(self, key: bytes, verdict: Tuple[bool, str]):
+        self._entries[key] = verdict
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+class LatencyHistogram:
+    """Log2-bucketed latency histogram in microseconds (bucket i holds < 2**i us)."""
+    NUM_BUCKETS = 24  # Up to ~16 s; slower samples land in the last bucket
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets = [0] * self.NUM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        micros = seconds * 1e6
+        self.buckets[min(int(micros).bit_length(), self.NUM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += micros
+        if micros > self.max:
+            self.max = micros
+
+    def percentile(self, q: float) -> float:
+        """Upper bound (us) of the bucket holding the q-th percentile sample."""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return float(min(2 ** i, self.max))
+        return self.max
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count if self.count else 0.0,
+            "p50_us": self.percentile(50),
+            "p99_us": self.percentile(99),
+            "max_us": self.max,
+        }
+
+class InspectionStats:
+    """
+    Request counters and latency histograms per inspection stage and per
+    verdict code. Only exists when stats are enabled; disabled callers
+    hold None and skip the timing calls entirely.
+    """
 
-class PayloadInspector:
     def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.stages: Dict[str, LatencyHistogram] = {}
+        self.verdicts: Dict[str, LatencyHistogram] = {}
+
+    def lap(self, stage: str, started: float) -> float:
+        """Records the time since `started` under `stage` and returns the new start."""
+        now = time.perf_counter()
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = LatencyHistogram()
+        histogram.observe(now - started)
+        return now
+
+    def record_verdict(self, status: str, seconds: float):
+        code = status.split(":", 1)[0]  # Drop the matched signature from the code
+        histogram = self.verdicts.get(code)
+        if histogram is None:
+            histogram = self.verdicts[code] = LatencyHistogram()
+        histogram.observe(seconds)
+        self.requests += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        uptime = time.time() - self.started
+        return {
+            "uptime_sec": uptime,
+            "requests": self.requests,
+            "requests_per_sec": self.requests / uptime if uptime > 0 else 0.0,
+            "stages": {name: h.to_dict() for name, h in self.stages.items()},
+            "verdicts": {code: h.to_dict() for code, h in self.verdicts.items()},
+        }
+
+class PayloadInspector:
+    def __init__(self, signature_file: Optional[str] = None, verdict_cache_size: int = 4096,
+                 stats: Optional[InspectionStats] = None):
         self.max_payload_size = 1048576  # 1 MB max
+        self.entropy_threshold = 7.5
+        # Payloads above this size are estimated from evenly spaced windows
+        self.entropy_sample_size = 65536
+        self.entropy_window_size = 4096
+        # Budget for walking the params tree; anything deeper or wider is rejected
+        self.max_params_depth = 32
+        self.max_params_leaves = 10000
+        self.max_batch_items = 1000
+        self._batch_decoder = json.JSONDecoder()
+        # None allows every method; otherwise a set of permitted method names
+        self._allowed_methods: Optional[frozenset] = None
         self.compiled_patterns = [
             re.compile(r'(\%27)|(\')|(\-\-)|(\%23)|(#)', re.IGNORECASE),
-            re.compile(r'((?i)drop\s+table|insert\s+into|delete\s+from)', re.IGNORECASE),
+            re.compile(r'(drop\s+table|insert\s+into|delete\s+from)', re.IGNORECASE),
             re.compile(r'(\b(base64_decode|eval|exec|system|popen)\b)', re.IGNORECASE)
         ]
+        # Forbidden tokens and threat signatures, optionally hot-reloaded from a file
+        self.signature_file = signature_file
+        self.signature_check_interval = 1.0
+        self._signature_mtime = 0.0
+        self._next_signature_check = 0.0
+        self.signatures = SignatureMatcher(FORBIDDEN_APPLESCRIPT_TOKENS, THREAT_VECTOR_SIGNATURES)
+        self.refresh_signatures(force=True)
+        # Agents resend identical bodies constantly; 0 disables the cache
+        self.verdict_cache = VerdictCache(verdict_cache_size) if verdict_cache_size > 0 else None
+        self.stats = stats
+
+    @property
+    def allowed_methods(self) -> Optional[frozenset]:
+        return self._allowed_methods
+
+    @allowed_methods.setter
+    def allowed_methods(self, methods: Optional[Iterable[str]]):
+        # Cached verdicts were reached under the old allow-list
+        self._allowed_methods = frozenset(methods) if methods is not None else None
+        if self.verdict_cache is not None:
+            self.verdict_cache.clear()
 
-    def _calculate_entropy(self, data: str) -> float:
-        import math
+    def refresh_signatures(self, force: bool = False) -> bool:
+        """Rebuilds the matcher if the signature file changed. Returns True on reload."""
+        if not self.signature_file:
+            return False
+        now = time.monotonic()
+        if not force and now < self._next_signature_check:
+            return False
+        self._next_signature_check = now + self.signature_check_interval
+
+        try:
+            mtime = os.stat(self.signature_file).st_mtime
+        except OSError as e:
+            logging.error(f"Signature file unavailable, keeping matcher v{self.signatures.version}: {e}")
+            return False
+        if mtime == self._signature_mtime:
+            return False
+
+        try:
+            forbidden_tokens, threat_vectors = SignatureMatcher.load_signature_file(self.signature_file)
+        except OSError as e:
+            logging.error(f"Failed to reload signatures from {self.signature_file}: {e}")
+            return False
+        except ValueError as e:
+            # Not retried until the file changes again
+            self._signature_mtime = mtime
+            logging.error(f"Invalid signature file {self.signature_file}, keeping matcher v{self.signatures.version}: {e}")
+            return False
+
+        self._signature_mtime = mtime
+        try:
+            self.signatures.rebuild(forbidden_tokens, threat_vectors)
+        except Exception as e:
+            logging.error(f"Failed to compile signatures from {self.signature_file}, "
+                          f"keeping matcher v{self.signatures.version}: {e}")
+            return False
+        return True
+
+    @staticmethod
+    def _histogram_entropy(histogram: Counter, total: int) -> float:
+        entropy = 0.0
+        for count in histogram.values():
+            p_x = count / total
+            entropy -= p_x * math.log2(p_x)
+        return entropy
+
+    def _calculate_entropy(self, data: bytes, threshold: Optional[float] = None) -> float:
+        """
+        Shannon entropy in bits per byte, from a single-pass byte histogram.
+        Large payloads are sampled window by window; with a threshold, the
+        running estimate is returned as soon as it exceeds it.
+        """
         if not data:
             return 0.0
+        if len(data) <= self.entropy_sample_size:
+            return self._histogram_entropy(Counter(data), len(data))
+
+        window = self.entropy_window_size
+        num_windows = self.entropy_sample_size // window
+        stride = (len(data) - window) // (num_windows - 1)
+        histogram = Counter()
+        sampled = 0
         entropy = 0.0
-        for x in range(256):
-            p_x = float(data.count(chr(x))) / len(data)
-            if p_x > 0:
-                entropy += - p_x * math.log(p_x, 2)
+        view = memoryview(data)
+        for start in range(0, stride * num_windows, stride):
+            histogram.update(view[start:start + window])
+            sampled += window
+            entropy = self._histogram_entropy(histogram, sampled)
+            if threshold is not None and entropy > threshold:
+                break
         return entropy
 
-    def inspect_json_rpc(self, raw_payload: bytes) -> Tuple[bool, str]:
+    def _scan_text(self, params: Any) -> Optional[str]:
+        """
+        Lowercased text of every string key and value in the params tree,
+        one leaf per line, so the heuristics and signatures scan it in one
+        pass. Returns None when the tree exceeds the depth or leaf budget.
+        """
+        leaves: List[str] = []
+        stack = [(params, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if isinstance(node, str):
+                leaves.append(node)
+                continue
+            if isinstance(node, dict):
+                leaves.extend(key for key in node if isinstance(key, str))
+                children = node.values()
+            elif isinstance(node, list):
+                children = node
+            else:
+                continue  # Numbers, booleans and null carry no signatures
+            if depth >= self.max_params_depth:
+                return None
+            stack.extend((child, depth + 1) for child in children)
+            if len(leaves) + len(stack) > self.max_params_leaves:
+                return None
+        return '\n'.join(leaves).lower()
+
+    def split_batch(self, raw_payload: bytes) -> List[Tuple[bytes, Any]]:
+        """
+        Splits a JSON-RPC batch array into (raw item bytes, parsed item)
+        pairs with a single parse of the body. Raises ValueError carrying
+        the verdict code when the batch itself is unacceptable.
+        """
         if len(raw_payload) > self.max_payload_size:
-            return False, "ERR_PAYLOAD_TOO_LARGE"
-            
+            raise ValueError("ERR_PAYLOAD_TOO_LARGE")
         try:
-            payload_str = raw_payload.decode('utf-8')
+            text = raw_payload.decode('utf-8')
         except UnicodeDecodeError:
-            return False, "ERR_INVALID_UTF8"
+            raise ValueError("ERR_INVALID_UTF8")
 
-        # Check entropy for obfuscated payloads
-        if self._calculate_entropy(payload_str) > 7.5:
-            return False, "ERR_HIGH_ENTROPY_DETECTED"
+        skip = _JSON_WHITESPACE.match
+        pos = skip(text).end()
+        if not text.startswith('[', pos):
+            raise ValueError("ERR_MALFORMED_JSON")
+        pos = skip(text, pos + 1).end()
+        if text.startswith(']', pos):
+            raise ValueError("ERR_EMPTY_BATCH")
 
-        try:
-            parsed = json.loads(payload_str)
-        except json.JSONDecodeError:
-            return False, "ERR_MALFORMED_JSON"
+        items: List[Tuple[bytes, Any]] = []
+        while True:
+            try:
+                item, end = self._batch_decoder.raw_decode(text, pos)
+            except (json.JSONDecodeError, RecursionError):
+                raise ValueError("ERR_MALFORMED_JSON")
+            items.append((text[pos:end].encode('utf-8'), item))
+            if len(items) > self.max_batch_items:
+                raise ValueError("ERR_BATCH_TOO_LARGE")
+
+            pos = skip(text, end).end()
+            if text.startswith(']', pos):
+                break
+            if not text.startswith(',', pos):
+                raise ValueError("ERR_MALFORMED_JSON")
+            pos = skip(text, pos + 1).end()
+
+        if skip(text, pos + 1).end() != len(text):
+            raise ValueError("ERR_MALFORMED_JSON")
+        return items
+
+    def inspect_many(self, payloads: Iterable[bytes]) -> List[Tuple[bool, str]]:
+        """Verdicts for several payloads, in order. Repeats within the call are inspected once."""
+        verdicts: List[Tuple[bool, str]] = []
+        seen: Dict[bytes, Tuple[bool, str]] = {}
+        for payload in payloads:
+            verdict = seen.get(payload)
+            if verdict is None:
+                verdict = seen[payload] = self.inspect_json_rpc(payload)
+            verdicts.append(verdict)
+        return verdicts
+
+    def inspect_json_rpc(self, raw_payload: bytes, parsed: Any = None) -> Tuple[bool, str]:
+        """Verdict for one payload; batch callers pass the already-parsed item along."""
+        if len(raw_payload) > self.max_payload_size:
+            return False, "ERR_PAYLOAD_TOO_LARGE"
+
+        stats = self.stats
+        started = time.perf_counter() if stats else 0.0
+
+        if self.verdict_cache is None:
+            verdict = self._inspect_payload(raw_payload, parsed)
+        else:
+            key = VerdictCache.digest(raw_payload)
+            verdict = self.verdict_cache.get(key, self.signatures.version)
+            if verdict is None:
+                verdict = self._inspect_payload(raw_payload, parsed)
+                self.verdict_cache.put(key, verdict)
+
+        if stats:
+            stats.record_verdict(verdict[1], time.perf_counter() - started)
+        return verdict
 
-        if "method" not in parsed or "jsonrpc" not in parsed:
+    def _inspect_payload(self, raw_payload: bytes, parsed: Any = None) -> Tuple[bool, str]:
+        stats = self.stats
+        t = time.perf_counter() if stats else 0.0
+
+        if parsed is None:
+            try:
+                payload_str = raw_payload.decode('utf-8')
+            except UnicodeDecodeError:
+                return False, "ERR_INVALID_UTF8"
+            if stats:
+                t = stats.lap("decode", t)
+
+            try:
+                parsed = json.loads(payload_str)
+            except (json.JSONDecodeError, RecursionError):
+                return False, "ERR_MALFORMED_JSON"
+            if stats:
+                t = stats.lap("json_parse", t)
+
+        # Cheap structural checks first
+        if not isinstance(parsed, dict) or "method" not in parsed or "jsonrpc" not in parsed:
             return False, "ERR_INVALID_RPC_PROTOCOL"
 
+        method = parsed["method"]
+        if self.allowed_methods is not None and method not in self.allowed_methods:
+            return False, "ERR_METHOD_NOT_ALLOWED"
+
         params = parsed.get("params", {})
-        param_str = json.dumps(params).lower()
+
+        # Library-First Workflow Enforcement
+        if method == "play_track" and isinstance(params, dict):
+            track_id = params.get("id", "")
+            if track_id and not (isinstance(track_id, str) and track_id.startswith("i.")):
+                return False, "ERR_LIBRARY_FIRST_VIOLATION"
+        if stats:
+            t = stats.lap("rpc_checks", t)
+
+        # Check entropy for obfuscated payloads; n bytes never exceed log2(n) bits
+        if (len(raw_payload) > 2 ** self.entropy_threshold
+                and self._calculate_entropy(raw_payload, self.entropy_threshold) > self.entropy_threshold):
+            return False, "ERR_HIGH_ENTROPY_DETECTED"
+        if stats:
+            t = stats.lap("entropy", t)
+
+        param_str = self._scan_text(params)
+        if param_str is None:
+            return False, "ERR_PARAMS_TOO_COMPLEX"
+        if stats:
+            t = stats.lap("params_walk", t)
 
         # Regex heuristics
         for pattern in self.compiled_patterns:
             if pattern.search(param_str):
                 return False, "ERR_HEURISTIC_SIGNATURE_MATCH"
+        if stats:
+            t = stats.lap("regex", t)
 
-        # AppleScript Sandbox Check
-        for token in FORBIDDEN_APPLESCRIPT_TOKENS:
-            if token in param_str:
-                return False, f"ERR_RESTRICTED_TOKEN: {token}"
-
-        # Library-First Workflow Enforcement
-        if parsed.get("method") == "play_track":
-            track_id = params.get("id", "")
-            if track_id and not track_id.startswith("i."):
-                return False, "ERR_LIBRARY_FIRST_VIOLATION"
+        # AppleScript Sandbox Check + threat signatures, in one scan
+        signature_hit = self.signatures.match(param_str)
+        if stats:
+            stats.lap("token_scan", t)
+        if signature_hit:
+            code, signature = signature_hit
+            return False, f"{code}: {signature}"
 
         return True, "CLEAN"
 
 class ClawSecDaemon:
-    def __init__(self, bind_address: str = "/tmp/clawsec_filter.sock"):
+    def __init__(self, bind_address: str = "/tmp/clawsec_filter.sock", signature_file: Optional[str] = None,
+                 profile_snapshot: Optional[str] = None, snapshot_interval: float = 300.0,
+                 enable_stats: bool = False, stats_file: Optional[str] = None, stats_interval: float = 60.0):
         self.bind_address = bind_address
-        self.inspector = PayloadInspector()
-        self.agent_profiles: Dict[str, SecurityProfile] = {}
-        self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.stats = InspectionStats() if enable_stats else None
+        self.inspector = PayloadInspector(signature_file, stats=self.stats)
+        self.agent_profiles = ProfileStore()
+        self.server_socket: Optional[socket.socket] = None
+        self.max_frame_size = AGENT_HEADER_LEN + self.inspector.max_payload_size
         self.is_running = False
 
+        # Optional periodic persistence of agent profiles across restarts
+        self.profile_snapshot = profile_snapshot
+        self.snapshot_interval = snapshot_interval
+        self._next_snapshot = time.monotonic() + snapshot_interval
+        if profile_snapshot and os.path.exists(profile_snapshot):
+            try:
+                loaded = self.agent_profiles.load(profile_snapshot)
+                logging.info(f"Restored {loaded} agent profiles from {profile_snapshot}")
+            except (OSError, ValueError, KeyError) as e:
+                logging.error(f"Failed to restore agent profiles from {profile_snapshot}: {e}")
+
+        # Periodic stats dump, to the log or (atomically) to a JSON file
+        self.stats_file = stats_file
+        self.stats_interval = stats_interval
+        self._next_stats_dump = time.monotonic() + stats_interval
+
     def get_profile(self, agent_id: str) -> SecurityProfile:
-        if agent_id not in self.agent_profiles:
-            self.agent_profiles[agent_id] = SecurityProfile(agent_id=agent_id)
-        return self.agent_profiles[agent_id]
+        return self.agent_profiles.get(agent_id)
+
+    def save_profiles(self):
+        if not self.profile_snapshot:
+            return
+        try:
+            self.agent_profiles.snapshot(self.profile_snapshot)
+        except OSError as e:
+            logging.error(f"Failed to snapshot agent profiles: {e}")
+
+    def _maybe_snapshot(self):
+        if self.profile_snapshot and time.monotonic() >= self._next_snapshot:
+            self._next_snapshot = time.monotonic() + self.snapshot_interval
+            self.save_profiles()
+
+    def stats_report(self) -> Dict[str, Any]:
+        report: Dict[str, Any] = {"enabled": self.stats is not None}
+        if self.stats:
+            report.update(self.stats.snapshot())
+        if self.inspector.verdict_cache is not None:
+            report["verdict_cache"] = self.inspector.verdict_cache.stats()
+        report["signature_version"] = self.inspector.signatures.version
+        report["agent_profiles"] = len(self.agent_profiles)
+        return report
+
+    def dump_stats(self):
+        report = json.dumps(self.stats_report())
+        if not self.stats_file:
+            logging.info(f"Stats: {report}")
+            return
+        try:
+            tmp_path = f"{self.stats_file}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(report)
+            os.replace(tmp_path, self.stats_file)
+        except OSError as e:
+            logging.error(f"Failed to write stats to {self.stats_file}: {e}")
+
+    def _maybe_dump_stats(self):
+        if self.stats and time.monotonic() >= self._next_stats_dump:
+            self._next_stats_dump = time.monotonic() + self.stats_interval
+            self.dump_stats()
+
+    def _stats_request(self, data: bytes) -> Optional[bytes]:
+        """Answers a {"method": "stats"} JSON-RPC request, or returns None for anything else."""
+        # A stats request is tiny; anything larger is left to the inspector's single parse
+        if len(data) > STATS_REQUEST_MAX_SIZE or b'"stats"' not in data:
+            return None
+        try:
+            request = json.loads(data)
+        except (ValueError, RecursionError):
+            return None
+        if not isinstance(request, dict) or request.get("method") != "stats":
+            return None
+        return json.dumps({"jsonrpc": "2.0", "result": self.stats_report(),
+                           "id": request.get("id")}).encode('utf-8')
+
+    def inspect_many(self, requests: Iterable[Tuple[str, bytes]]) -> List[Tuple[bool, str]]:
+        """
+        Inspects (agent_id, payload) pairs in order, penalizing the sending
+        agent once per rejected item. Items from an agent isolated earlier
+        in the same call are rejected without inspection.
+        """
+        self.inspector.refresh_signatures()
+        return [self._inspect_for_agent(agent_id, payload) for agent_id, payload in requests]
+
+    def _inspect_for_agent(self, agent_id: str, payload: bytes, parsed: Any = None) -> Tuple[bool, str]:
+        if self.get_profile(agent_id).risk_score > ISOLATION_RISK_THRESHOLD:
+            return False, "AGENT_ISOLATED_BY_CLAWSEC"
+        verdict = self.inspector.inspect_json_rpc(payload, parsed)
+        if not verdict[0]:
+            self.penalize_agent(agent_id, verdict[1])
+        return verdict
+
+    @staticmethod
+    def _verdict_reply(verdict: Tuple[bool, str], request_id: Any = None) -> Dict[str, Any]:
+        is_clean, status = verdict
+        if is_clean:
+            reply: Dict[str, Any] = {"jsonrpc": "2.0", "result": "ACK_CLEAN"}
+        elif status == "AGENT_ISOLATED_BY_CLAWSEC":
+            reply = {"jsonrpc": "2.0", "error": {"code": -32000, "message": status}}
+        else:
+            reply = {"jsonrpc": "2.0", "error": {"code": -32600, "message": f"ClawSec Intervention: {status}"}}
+        if request_id is not None:
+            reply["id"] = request_id
+        return reply
+
+    def _process_batch(self, agent_id: str, data: bytes) -> bytes:
+        """One round trip for a JSON-RPC batch: replies come back in request order, echoing ids."""
+        try:
+            items = self.inspector.split_batch(data)
+        except ValueError as e:
+            status = str(e)
+            self.penalize_agent(agent_id, status)
+            return json.dumps(self._verdict_reply((False, status))).encode('utf-8')
+
+        replies = []
+        for raw_item, item in items:
+            verdict = self._inspect_for_agent(agent_id, raw_item, item)
+            request_id = item.get("id") if isinstance(item, dict) else None
+            replies.append(self._verdict_reply(verdict, request_id))
+        return json.dumps(replies).encode('utf-8')
 
     def penalize_agent(self, agent_id: str, reason: str, weight: float = 10.0):
         profile = self.get_profile(agent_id)
-        profile.risk_score += weight
+        now = time.time()
+        profile.risk_base = profile.current_risk(now) + weight
+        profile.risk_updated = now
         profile.blocked_requests += 1
-        profile.last_violation = time.time()
-        profile.violation_history.append(f"[{time.time()}] {reason}")
+        profile.last_violation = now
+        profile.violation_history.append(f"[{now}] {reason}")
         
         logging.warning(f"Agent {agent_id} penalized. Reason: {reason}. New Risk Score: {profile.risk_score}")
         
-        if profile.risk_score > 50.0:
+        if profile.risk_score > ISOLATION_RISK_THRESHOLD:
             logging.error(f"CRITICAL: Agent {agent_id} exceeded risk threshold. Isolating neural pathways.")
 
-    def handle_connection(self, conn: socket.socket):
+    def process_message(self, data: bytes) -> bytes:
+        """Inspects one IPC message (optional agent header + JSON-RPC body) and returns the reply."""
         client_agent_id = "UNKNOWN_CORE"
+
+        # Assume custom header injects agent ID for local IPC
+        if len(data) > AGENT_HEADER_LEN:
+            potential_id = data[:AGENT_HEADER_LEN].decode('utf-8', errors='ignore').strip('\x00')
+            if potential_id.startswith("CORE_"):
+                client_agent_id = potential_id
+                data = data[AGENT_HEADER_LEN:]
+
+        self.inspector.refresh_signatures()
+        self._maybe_snapshot()
+        self._maybe_dump_stats()
+
+        profile = self.get_profile(client_agent_id)
+        if profile.risk_score > ISOLATION_RISK_THRESHOLD:
+            return b'{"jsonrpc":"2.0","error":{"code":-32000,"message":"AGENT_ISOLATED_BY_CLAWSEC"}}'
+
+        stats_reply = self._stats_request(data)
+        if stats_reply is not None:
+            return stats_reply
+
+        if data.lstrip()[:1] == b'[':
+            return self._process_batch(client_agent_id, data)
+
+        is_clean, status = self.inspector.inspect_json_rpc(data)
+
+        if not is_clean:
+            self.penalize_agent(client_agent_id, status)
+            return json.dumps({
+                "jsonrpc": "2.0",
+                "error": {
+                    "code": -32600,
+                    "message": f"ClawSec Intervention: {status}"
+                }
+            }).encode('utf-8')
+
+        logging.debug(f"Payload from {client_agent_id} cleared by ClawSec.")
+        return b'{"jsonrpc":"2.0","result":"ACK_CLEAN"}'
+
+    def handle_connection(self, conn: socket.socket):
+        """Legacy one-shot protocol: a single unframed message per connection."""
         try:
+            t = time.perf_counter() if self.stats else 0.0
             data = conn.recv(8192)
             if not data:
                 return
-
-            # Assume custom header injects agent ID for local IPC
-            header_len = 32
-            if len(data) > header_len:
-                potential_id = data[:header_len].decode('utf-8', errors='ignore').strip('\x00')
-                if potential_id.startswith("CORE_"):
-                    client_agent_id = potential_id
-                    data = data[header_len:]
-
-            profile = self.get_profile(client_agent_id)
-            if profile.risk_score > 50.0:
-                conn.sendall(b'{"jsonrpc":"2.0","error":{"code":-32000,"message":"AGENT_ISOLATED_BY_CLAWSEC"}}')
-                return
-
-            is_clean, status = self.inspector.inspect_json_rpc(data)
-
-            if not is_clean:
-                self.penalize_agent(client_agent_id, status)
-                error_response = json.dumps({
-                    "jsonrpc": "2.0",
-                    "error": {
-                        "code": -32600,
-                        "message": f"ClawSec Intervention: {status}"
-                    }
-                }).encode('utf-8')
-                conn.sendall(error_response)
-            else:
-                logging.debug(f"Payload from {client_agent_id} cleared by ClawSec.")
-                conn.sendall(b'{"jsonrpc":"2.0","result":"ACK_CLEAN"}')
+            if self.stats:
+                self.stats.lap("recv", t)
+            conn.sendall(self.process_message(data))
 
         except Exception as e:
             logging.error(f"Error handling IPC connection: {e}")
         finally:
             conn.close()
 
-    def start(self):
+    def _prepare_bind_address(self):
         if os.path.exists(self.bind_address):
             os.remove(self.bind_address)
-            
+
+    def start(self):
+        self._prepare_bind_address()
+        self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
         self.server_socket.bind(self.bind_address)
         self.server_socket.listen(128)
         self.is_running = True
@@ -223,8 +984,116 @@ class ClawSecDaemon:
             self.server_socket.close()
             if os.path.exists(self.bind_address):
                 os.remove(self.bind_address)
+            self.save_profiles()
+            if self.stats:
+                self.dump_stats()
+
+    async def _serve_framed_client(self, reader: "asyncio.StreamReader", writer: "asyncio.StreamWriter"):
+        """Persistent connection: length-prefixed request/response frames until EOF."""
+        import asyncio  # Already loaded by serve_async; kept out of module import time
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(FRAME_HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break  # Client closed the connection between frames
+                (length,) = FRAME_HEADER.unpack(header)
+
+                if length > self.max_frame_size:
+                    # The oversized body is not read, so the stream cannot be resynchronized
+                    reply = json.dumps({
+                        "jsonrpc": "2.0",
+                        "error": {"code": -32600, "message": "ClawSec Intervention: ERR_PAYLOAD_TOO_LARGE"}
+                    }).encode('utf-8')
+                    writer.write(FRAME_HEADER.pack(len(reply)) + reply)
+                    await writer.drain()
+                    break
+
+                t = time.perf_counter() if self.stats else 0.0
+                data = await reader.readexactly(length)
+                if self.stats:
+                    self.stats.lap("recv", t)
+                reply = self.process_message(data)
+                writer.write(FRAME_HEADER.pack(len(reply)) + reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logging.debug(f"Framed client disconnected mid-frame: {e}")
+        except Exception as e:
+            logging.error(f"Error handling framed IPC connection: {e}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve_async(self):
+        """Serves many concurrent clients over persistent, length-prefixed connections."""
+        import asyncio
+        self._prepare_bind_address()
+        server = await asyncio.start_unix_server(self._serve_framed_client, path=self.bind_address, backlog=128)
+        self.is_running = True
+
+        logging.info(f"ClawSec Integrity Monitor (async, framed) bound to {self.bind_address}")
+        logging.info("Zero-Trust Policy Enforcer Active. Awaiting payloads.")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.is_running = False
+            if os.path.exists(self.bind_address):
+                os.remove(self.bind_address)
+            self.save_profiles()
+            if self.stats:
+                self.dump_stats()
+
+    def start_async(self):
+        import asyncio
+        try:
+            asyncio.run(self.serve_async())
+        except KeyboardInterrupt:
+            logging.info("Shutting down ClawSec Monitor...")
+
+def write_frame(sock: socket.socket, payload: bytes):
+    """Client helper for the async server: sends one length-prefixed frame."""
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+def read_frame(sock: socket.socket) -> bytes:
+    """Client helper for the async server: receives one length-prefixed frame."""
+    def recv_exactly(size: int) -> bytes:
+        chunks = []
+        while size:
+            chunk = sock.recv(min(size, 65536))
+            if not chunk:
+                raise ConnectionError("Connection closed mid-frame")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    (length,) = FRAME_HEADER.unpack(recv_exactly(FRAME_HEADER.size))
+    return recv_exactly(length)
 
 if __name__ == "__main__":
-    daemon = ClawSecDaemon()
-    daemon.start()
+    import argparse
+    parser = argparse.ArgumentParser(description="ClawSec Neural Integrity Monitor")
+    parser.add_argument("--socket", type=str, default="/tmp/clawsec_filter.sock", help="UNIX socket path")
+    parser.add_argument("--signatures", type=str, default=os.environ.get("CLAWSEC_SIGNATURE_FILE"),
+                        help="JSON signature file (hot-reloaded)")
+    parser.add_argument("--profile-snapshot", type=str, default=None,
+                        help="JSON file agent profiles are periodically saved to and restored from")
+    parser.add_argument("--stats", action="store_true",
+                        help="Collect per-stage latency histograms (queryable via the 'stats' method)")
+    parser.add_argument("--stats-file", type=str, default=None,
+                        help="Periodically write stats to this JSON file instead of the log")
+    parser.add_argument("--stats-interval", type=float, default=60.0, help="Seconds between stats dumps")
+    parser.add_argument("--async-server", action="store_true",
+                        help="Concurrent server with length-prefixed frames and persistent connections")
+    args = parser.parse_args()
 
+    daemon = ClawSecDaemon(bind_address=args.socket, signature_file=args.signatures,
+                           profile_snapshot=args.profile_snapshot, enable_stats=args.stats,
+                           stats_file=args.stats_file, stats_interval=args.stats_interval)
+    if args.async_server:
+        daemon.start_async()
+    else:
+        daemon.start()
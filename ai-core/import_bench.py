@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Vahla MultiClaw - Import-Time Benchmark
+
+Measures the cold import cost of ai-core modules. Each sample runs in a
+fresh interpreter with `-X importtime`, so the figures reflect what a
+supervisor restart pays; the reported number is the median cumulative
+import time of the module itself. An unsampled warm-up import writes the
+bytecode cache first, so source compilation (paid once per deploy, or on
+every run under PYTHONDONTWRITEBYTECODE) does not skew the figures.
+
+Usage:
+    python3 import_bench.py [--runs N] [module ...]
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from typing import List
+
+DEFAULT_MODULES = ["latent_audio_compiler", "clawsec_monitor", "zk_consensus_node", "render_farm"]
+
+def measure_import(module: str, runs: int) -> List[float]:
+    """Returns cumulative import times in milliseconds, one per fresh interpreter."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=here, env=env, capture_output=True)
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=here,
+            env=env,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed: {result.stderr.strip().splitlines()[-1]}")
+        for line in reversed(result.stderr.splitlines()):
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module:
+                samples.append(int(fields[1]) / 1000.0)
+                break
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description="ClawFM ai-core import-time benchmark")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters per module")
+    args = parser.parse_args()
+
+    print(f"{'module':<28}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for module in args.modules:
+        samples = measure_import(module, args.runs)
+        print(f"{module:<28}{statistics.median(samples):>12.2f}{min(samples):>10.2f}{max(samples):>10.2f}")
+
+if __name__ == "__main__":
+    main()
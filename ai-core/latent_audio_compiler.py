@@ -9,21 +9,113 @@ using pure Python standard libraries. This bypasses the need for
 heavy PyTorch/CUDA dependencies on edge nodes.
 """
 
+import os
 import math
 import struct
+import sys
 import random
 import time
 import logging
-from typing import List, Tuple
+from array import array
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+np = None  # Bound by _load_numpy() on first use, keeping module import cheap
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] [TENSOR_COMPILER] %(message)s')
 
 # ------------------------------------------------------------------------
 # NEURAL WEIGHT MATRICES (Inflated memory allocation for GitHub metrics)
+# Materialized on first use as array('d') tables, or memory-mapped from a
+# file written by export_weight_tables() when one is present.
 # ------------------------------------------------------------------------
-LAYER_1_WEIGHTS = [math.sin(i * 0.01) * 0.5 for i in range(15000)]
-LAYER_2_WEIGHTS = [math.cos(i * 0.02) * 0.5 for i in range(15000)]
-ATTENTION_HEADS = [math.tan(i * 0.005) % 1.0 for i in range(15000)]
+WEIGHT_TABLE_SIZE = 15000
+WEIGHT_TABLE_GENERATORS = {
+    "LAYER_1_WEIGHTS": lambda i: math.sin(i * 0.01) * 0.5,
+    "LAYER_2_WEIGHTS": lambda i: math.cos(i * 0.02) * 0.5,
+    "ATTENTION_HEADS": lambda i: math.tan(i * 0.005) % 1.0,
+}
+WEIGHTS_FILE_MAGIC = b'CLAWWT01'
+WEIGHTS_FILE = os.environ.get(
+    "CLAWFM_WEIGHTS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "latent_weights.bin")
+)
+
+STREAM_BLOCK_FRAMES = 4096  # Frames rendered per streamed block
+
+# Harmonic identity: (frequency ratio to the agent root, amplitude)
+DEFAULT_PARTIALS = ((1.0, 1.0), (2.03, 0.5), (3.01, 0.25))
+WAVETABLE_SIZE = 16384  # Points per cycle (plus one guard point for interpolation)
+
+# Decoder stack: (weight table, bias, activation) per layer
+DEFAULT_LAYER_STACK = (
+    ("LAYER_1_WEIGHTS", 0.0, "relu"),
+    ("ATTENTION_HEADS", 0.0, "sigmoid"),
+)
+
+# Bump whenever the rendering pipeline changes output, to invalidate cached artifacts
+RENDER_VERSION = 1
+
+@lru_cache(maxsize=None)
+def _load_numpy():
+    """Imports NumPy on demand; returns None on edge nodes without it."""
+    global np
+    try:
+        import numpy
+    except ImportError:
+        return None
+    np = numpy
+    return np
+
+@lru_cache(maxsize=None)
+def _map_weights_file(path: str) -> Optional[Dict[str, memoryview]]:
+    if sys.byteorder != 'little' or not os.path.exists(path):
+        return None
+    expected = len(WEIGHTS_FILE_MAGIC) + 8 * WEIGHT_TABLE_SIZE * len(WEIGHT_TABLE_GENERATORS)
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size != expected:
+            logging.warning(f"Ignoring weights file {path}: unexpected size")
+            return None
+        import mmap
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:len(WEIGHTS_FILE_MAGIC)] != WEIGHTS_FILE_MAGIC:
+        logging.warning(f"Ignoring weights file {path}: bad magic")
+        return None
+
+    values = memoryview(mapped)[len(WEIGHTS_FILE_MAGIC):].cast('d')
+    return {
+        name: values[i * WEIGHT_TABLE_SIZE:(i + 1) * WEIGHT_TABLE_SIZE]
+        for i, name in enumerate(WEIGHT_TABLE_GENERATORS)
+    }
+
+@lru_cache(maxsize=None)
+def weight_table(name: str) -> Sequence[float]:
+    """Returns a weight table, mapping the precomputed file or computing it once."""
+    tables = _map_weights_file(WEIGHTS_FILE)
+    if tables is not None:
+        return tables[name]
+    generator = WEIGHT_TABLE_GENERATORS[name]
+    return array('d', (generator(i) for i in range(WEIGHT_TABLE_SIZE)))
+
+def export_weight_tables(path: str = WEIGHTS_FILE) -> str:
+    """Precomputes every weight table into a file that later imports memory-map."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(WEIGHTS_FILE_MAGIC)
+        for generator in WEIGHT_TABLE_GENERATORS.values():
+            table = array('d', (generator(i) for i in range(WEIGHT_TABLE_SIZE)))
+            if sys.byteorder != 'little':
+                table.byteswap()
+            f.write(table.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+def __getattr__(name: str):
+    # Module-level access to the tables (e.g. latent_audio_compiler.LAYER_1_WEIGHTS)
+    if name in WEIGHT_TABLE_GENERATORS:
+        return weight_table(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class MockTensor:
     def __init__(self, data: List[float], shape: Tuple[int, ...]):
@@ -38,98 +130,629 @@ class MockTensor:
         self.data = [1.0 / (1.0 + math.exp(-max(min(x, 100), -100))) for x in self.data]
         return self
 
-    def linear_transform(self, weights: List[float], bias: float = 0.0):
-        # Simulate dot product projection
+    def linear_transform(self, weights: Sequence[float], bias: float = 0.0, offset: int = 0):
+        # Simulate dot product projection (offset = absolute index of data[0])
         out = []
         w_len = len(weights)
-        for i, val in enumerate(self.data):
+        for i, val in enumerate(self.data, offset):
             out.append((val * weights[i % w_len]) + bias)
         self.data = out
         return self
 
+    def lazy(self) -> "TensorPipeline":
+        """Records chained ops instead of running them; call evaluate() to run them fused."""
+        return TensorPipeline(bound=self)
+
+class TensorPipeline:
+    """
+    Lazily recorded chain of MockTensor ops. Nothing runs until the chain is
+    applied; it then executes as a single fused pass (one generated kernel
+    per element on the stdlib path, in place over one buffer with NumPy)
+    instead of allocating a full-length temporary per op.
+    """
+
+    ACTIVATIONS = ("relu", "sigmoid", "identity")
+
+    def __init__(self, bound: Optional[MockTensor] = None):
+        self.ops: List[tuple] = []
+        self._bound = bound
+        self._kernel = None
+        self._array_weights = {}
+
+    @classmethod
+    def from_layers(cls, layers: Sequence[Tuple[str, float, str]]) -> "TensorPipeline":
+        pipeline = cls()
+        for table_name, bias, activation in layers:
+            if table_name not in WEIGHT_TABLE_GENERATORS:
+                raise ValueError(f"Unknown weight table: {table_name}")
+            if activation not in cls.ACTIVATIONS:
+                raise ValueError(f"Unknown activation: {activation}")
+            pipeline.linear_transform(weight_table(table_name), bias)
+            if activation != "identity":
+                getattr(pipeline, activation)()
+        return pipeline
+
+    def _record(self, *op) -> "TensorPipeline":
+        self.ops.append(op)
+        self._kernel = None
+        self._array_weights = {}
+        return self
+
+    def linear_transform(self, weights: Sequence[float], bias: float = 0.0) -> "TensorPipeline":
+        return self._record("linear", weights, bias)
+
+    def relu(self) -> "TensorPipeline":
+        return self._record("relu")
+
+    def sigmoid(self) -> "TensorPipeline":
+        return self._record("sigmoid")
+
+    def _compile_kernel(self):
+        # Same per-element expressions as the eager MockTensor ops, nested so
+        # each element passes through the whole chain in one comprehension.
+        env = {"exp": math.exp}
+        expr = "x"
+        for k, op in enumerate(self.ops):
+            if op[0] == "linear":
+                env[f"w{k}"], env[f"n{k}"], env[f"b{k}"] = op[1], len(op[1]), op[2]
+                expr = f"(({expr}) * w{k}[i % n{k}]) + b{k}"
+            elif op[0] == "relu":
+                expr = f"max(0.0, {expr})"
+            else:
+                expr = f"1.0 / (1.0 + exp(-max(min({expr}, 100), -100)))"
+        return eval(f"lambda data, offset: [{expr} for i, x in enumerate(data, offset)]", env)
+
+    def apply(self, data: Sequence[float], offset: int = 0) -> List[float]:
+        """Runs the chain over data (offset = absolute index of data[0])."""
+        if self._kernel is None:
+            self._kernel = self._compile_kernel()
+        return self._kernel(data, offset)
+
+    def _tiled(self, k: int, offset: int, num_samples: int):
+        """Weights of op k repeated cyclically, starting at absolute index offset."""
+        table = self._array_weights.get(k)
+        if table is None:
+            table = self._array_weights[k] = np.asarray(self.ops[k][1], dtype=np.float64)
+        shift = offset % table.shape[0]
+        if shift:
+            table = np.roll(table, -shift)
+        return np.resize(table, num_samples)
+
+    def apply_array(self, data, offset: int = 0):
+        """NumPy counterpart of apply(); overwrites and returns the float64 buffer data."""
+        for k, op in enumerate(self.ops):
+            if op[0] == "linear":
+                data *= self._tiled(k, offset, data.shape[0])
+                if op[2]:
+                    data += op[2]
+            elif op[0] == "relu":
+                np.maximum(data, 0.0, out=data)
+            else:
+                np.clip(data, -100, 100, out=data)
+                np.negative(data, out=data)
+                np.exp(data, out=data)
+                data += 1.0
+                np.reciprocal(data, out=data)
+        return data
+
+    def evaluate(self, offset: int = 0) -> MockTensor:
+        """Executes the recorded chain against the tensor returned by MockTensor.lazy()."""
+        if self._bound is None:
+            raise RuntimeError("Pipeline is not bound to a tensor; use apply() instead")
+        self._bound.data = self.apply(self._bound.data, offset)
+        return self._bound
+
+@lru_cache(maxsize=None)
+def sine_wavetable(size: int = WAVETABLE_SIZE) -> array:
+    """One sine cycle sampled at size points, with a wrap-around guard point."""
+    table = array('d', (math.sin(2 * math.pi * i / size) for i in range(size)))
+    table.append(table[0])
+    return table
+
+@lru_cache(maxsize=64)
+def harmonic_wavetable(harmonics: Tuple[Tuple[int, float], ...], size: int = WAVETABLE_SIZE) -> array:
+    """Sum of integer harmonics of one cycle, built from the cached sine table."""
+    sine = sine_wavetable(size)
+    table = array('d', bytes(8 * (size + 1)))
+    for harmonic, amplitude in harmonics:
+        for i in range(size + 1):
+            table[i] += amplitude * sine[(harmonic * i) % size]
+    return table
+
+class OscillatorBank:
+    """
+    Sums sine partials for one voice. Two or more integer-ratio partials are
+    folded into a single composite wavetable, so a harmonic series costs one
+    interpolated lookup per frame regardless of its length; the remaining
+    partials are evaluated directly. The bank tracks its frame position, so
+    consecutive render() calls are phase continuous.
+    """
+
+    def __init__(self, base_freq: float, sample_rate: int,
+                 partials: Sequence[Tuple[float, float]] = DEFAULT_PARTIALS,
+                 table_size: int = WAVETABLE_SIZE):
+        self.base_freq = base_freq
+        self.sample_rate = sample_rate
+        self.table_size = table_size
+        self.position = 0
+
+        nyquist = sample_rate / 2
+        harmonics = {}
+        direct = []
+        for ratio, amplitude in partials:
+            if base_freq * ratio >= nyquist:
+                continue  # Would alias
+            if ratio >= 1 and ratio == int(ratio):
+                harmonics[int(ratio)] = harmonics.get(int(ratio), 0.0) + amplitude
+            else:
+                direct.append((ratio, amplitude))
+
+        self.table = None
+        if len(harmonics) > 1:
+            self.table = harmonic_wavetable(tuple(sorted(harmonics.items())), table_size)
+        else:
+            direct = [(float(r), a) for r, a in harmonics.items()] + direct
+        # Angular frequency per partial, grouped as in the original formula
+        self.direct = [(2 * math.pi * (base_freq * ratio), amplitude) for ratio, amplitude in direct]
+
+    def render(self, num_frames: int) -> List[float]:
+        start = self.position
+        self.position += num_frames
+        frames = range(start, start + num_frames)
+        sample_rate = self.sample_rate
+        wave = [0.0] * num_frames
+
+        if self.table is not None:
+            table = self.table
+            size = self.table_size
+            increment = self.base_freq / sample_rate
+            floor = math.floor
+            for k, n in enumerate(frames):
+                cycle = increment * n
+                cycle -= floor(cycle)
+                pos = cycle * size
+                idx = int(pos)
+                low = table[idx]
+                wave[k] += low + (table[idx + 1] - low) * (pos - idx)
+
+        sin = math.sin
+        for omega, amplitude in self.direct:
+            wave = [w + amplitude * sin(omega * (n / sample_rate)) for w, n in zip(wave, frames)]
+        return wave
+
+    def render_array(self, num_frames: int):
+        """NumPy counterpart of render(); performs the same operations elementwise."""
+        start = self.position
+        self.position += num_frames
+        frames = np.arange(start, start + num_frames, dtype=np.float64)
+        wave = np.zeros(num_frames)
+
+        if self.table is not None:
+            table = np.frombuffer(self.table, dtype=np.float64)
+            cycle = (self.base_freq / self.sample_rate) * frames
+            cycle -= np.floor(cycle)
+            pos = cycle * self.table_size
+            idx = pos.astype(np.intp)
+            low = table[idx]
+            wave += low + (table[idx + 1] - low) * (pos - idx)
+
+        t = frames / self.sample_rate
+        for omega, amplitude in self.direct:
+            wave += amplitude * np.sin(omega * t)
+        return wave
+
+# (AudioFormat tag, bits per sample) for each supported WAV sample format
+WAV_FORMATS = {
+    "pcm16": (1, 16),
+    "pcm24": (1, 24),
+    "float32": (3, 32),
+}
+WAV_WRITE_CHUNK = 65536  # Samples packed per write() call
+
+def _encode_samples(samples, sample_format: str) -> bytes:
+    """Clamps float samples (-1.0 to 1.0) and packs them little-endian in one shot."""
+    if type(samples).__module__ == 'numpy' and _load_numpy() is not None:
+        clamped = np.clip(samples, -1.0, 1.0)
+        if sample_format == "float32":
+            return clamped.astype('<f4').tobytes()
+        if sample_format == "pcm16":
+            return (clamped * 32767.0).astype('<i2').tobytes()
+        ints = (clamped * 8388607.0).astype('<i4')
+        return ints.view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+
+    clamped = [max(-1.0, min(1.0, x)) for x in samples]
+    if sample_format == "float32":
+        packed = array('f', clamped)
+    elif sample_format == "pcm16":
+        packed = array('h', [int(x * 32767.0) for x in clamped])
+    else:
+        packed = array('i', [int(x * 8388607.0) for x in clamped])
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    raw = packed.tobytes()
+    if sample_format != "pcm24":
+        return raw
+
+    # Drop the high byte of every little-endian int32
+    out = bytearray(len(packed) * 3)
+    out[0::3] = raw[0::4]
+    out[1::3] = raw[1::4]
+    out[2::3] = raw[2::4]
+    return bytes(out)
+
+class WavStreamWriter:
+    """
+    Incrementally writes float audio to a WAV file. Samples are interleaved
+    across channels; RIFF/data sizes are patched into the header on close.
+    """
+
+    def __init__(self, filename: str, sample_rate: int = 44100, channels: int = 1, sample_format: str = "pcm16"):
+        if sample_format not in WAV_FORMATS:
+            raise ValueError(f"Unsupported WAV sample format: {sample_format}")
+        self.filename = filename
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_format = sample_format
+        self.format_tag, self.bits_per_sample = WAV_FORMATS[sample_format]
+        self.block_align = channels * self.bits_per_sample // 8
+        self.frames_written = 0
+        self._data_bytes = 0
+        self._file = open(filename, 'wb')
+        self._write_header()
+
+    def _write_header(self):
+        is_float = self.format_tag == 3
+        f = self._file
+        f.write(b'RIFF')
+        f.write(struct.pack('<I', 0))  # Patched on close
+        f.write(b'WAVE')
+
+        # fmt sub-chunk (non-PCM formats carry a zero cbSize extension)
+        f.write(b'fmt ')
+        f.write(struct.pack('<I', 18 if is_float else 16))
+        f.write(struct.pack(
+            '<HHIIHH',
+            self.format_tag,
+            self.channels,
+            self.sample_rate,
+            self.sample_rate * self.block_align,
+            self.block_align,
+            self.bits_per_sample
+        ))
+        if is_float:
+            f.write(struct.pack('<H', 0))
+            f.write(b'fact')
+            f.write(struct.pack('<I', 4))
+            self._fact_offset = f.tell()
+            f.write(struct.pack('<I', 0))  # Patched on close
+
+        # data sub-chunk
+        f.write(b'data')
+        self._data_size_offset = f.tell()
+        f.write(struct.pack('<I', 0))  # Patched on close
+
+    def write(self, samples) -> None:
+        """Appends a block of interleaved float samples (list, array or ndarray)."""
+        if len(samples) % self.channels:
+            raise ValueError("Sample block does not contain whole frames")
+        for start in range(0, len(samples), WAV_WRITE_CHUNK):
+            payload = _encode_samples(samples[start:start + WAV_WRITE_CHUNK], self.sample_format)
+            self._file.write(payload)
+            self._data_bytes += len(payload)
+        self.frames_written += len(samples) // self.channels
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        f = self._file
+        if self._data_bytes % 2:
+            f.write(b'\x00')  # RIFF chunks are word aligned
+        riff_size = f.tell() - 8
+        f.seek(4)
+        f.write(struct.pack('<I', riff_size))
+        if self.format_tag == 3:
+            f.seek(self._fact_offset)
+            f.write(struct.pack('<I', self.frames_written))
+        f.seek(self._data_size_offset)
+        f.write(struct.pack('<I', self._data_bytes))
+        f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
 class WavEncoder:
     @staticmethod
-    def write_wav(filename: str, audio_data: List[float], sample_rate: int = 44100):
-        """Writes raw float audio data (-1.0 to 1.0) to a 16-bit PCM WAV file."""
-        logging.info(f"Encoding {len(audio_data)} samples to 16-bit PCM WAV...")
-        
-        # Clamp data
-        clamped = [max(-1.0, min(1.0, x)) for x in audio_data]
-        # Convert to 16-bit integers
-        int_data = [int(x * 32767.0) for x in clamped]
-        
-        with open(filename, 'wb') as wav_file:
-            # RIFF chunk
-            wav_file.write(b'RIFF')
-            wav_file.write(struct.pack('<I', 36 + len(int_data) * 2))
-            wav_file.write(b'WAVE')
-            
-            # fmt sub-chunk
-            wav_file.write(b'fmt ')
-            wav_file.write(struct.pack('<I', 16)) # Subchunk1Size
-            wav_file.write(struct.pack('<H', 1))  # AudioFormat (PCM)
-            wav_file.write(struct.pack('<H', 1))  # NumChannels (Mono)
-            wav_file.write(struct.pack('<I', sample_rate)) # SampleRate
-            wav_file.write(struct.pack('<I', sample_rate * 2)) # ByteRate
-            wav_file.write(struct.pack('<H', 2))  # BlockAlign
-            wav_file.write(struct.pack('<H', 16)) # BitsPerSample
-            
-            # data sub-chunk
-            wav_file.write(b'data')
-            wav_file.write(struct.pack('<I', len(int_data) * 2))
-            
-            # Pack integer array into binary
-            for sample in int_data:
-                wav_file.write(struct.pack('<h', sample))
+    def write_wav(filename: str, audio_data, sample_rate: int = 44100, channels: int = 1, sample_format: str = "pcm16"):
+        """Writes raw float audio data (-1.0 to 1.0) to a WAV file (16-bit PCM by default)."""
+        logging.info(f"Encoding {len(audio_data)} samples to {sample_format} WAV...")
+
+        with WavStreamWriter(filename, sample_rate, channels, sample_format) as writer:
+            writer.write(audio_data)
                 
         logging.info(f"Successfully compiled artifact: {filename}")
 
+    @staticmethod
+    def write_wav_stream(filename: str, chunks: Iterable, sample_rate: int = 44100, channels: int = 1, sample_format: str = "pcm16") -> int:
+        """Writes an iterable of sample blocks without holding the whole track. Returns frames written."""
+        logging.info(f"Streaming {sample_format} WAV to {filename}...")
+
+        with WavStreamWriter(filename, sample_rate, channels, sample_format) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+
+        logging.info(f"Successfully compiled artifact: {filename} ({writer.frames_written} frames)")
+        return writer.frames_written
+
+class PythonRenderEngine:
+    """Reference renderer built on MockTensor and the math module."""
+
+    name = "python"
+
+    def noise(self, rng: random.Random, num_samples: int) -> List[float]:
+        return [rng.uniform(-0.1, 0.1) for _ in range(num_samples)]
+
+    def decode(self, base_noise: List[float], pipeline: TensorPipeline, offset: int = 0) -> List[float]:
+        return pipeline.apply(base_noise, offset)
+
+    def harmonize(self, latent: List[float], bank: OscillatorBank) -> List[float]:
+        wave = bank.render(len(latent))
+        # Modulate with neural output
+        return [w * (val + 0.1) for w, val in zip(wave, latent)]
+
+class NumpyRenderEngine:
+    """
+    Vectorized renderer. Mirrors PythonRenderEngine operation-for-operation
+    so both engines agree for a given seed; the noise is drawn from the
+    same Mersenne Twister state as the stdlib RNG.
+    """
+
+    name = "numpy"
+
+    def __init__(self):
+        if _load_numpy() is None:
+            raise RuntimeError("NumPy engine requested but numpy is not installed")
+
+    def noise(self, rng: random.Random, num_samples: int):
+        # Hand the stdlib MT19937 state to NumPy: random_sample() uses the
+        # same 53-bit construction as random.random(), so draws match exactly.
+        _, internal_state, _ = rng.getstate()
+        generator = np.random.RandomState()
+        generator.set_state(("MT19937", np.array(internal_state[:-1], dtype=np.uint32), internal_state[-1]))
+        samples = generator.random_sample(num_samples)
+
+        # Keep the stdlib RNG in step with what was consumed
+        mt_state = generator.get_state()
+        rng.setstate((3, tuple(int(k) for k in mt_state[1]) + (int(mt_state[2]),), None))
+        low, high = -0.1, 0.1
+        return low + (high - low) * samples
+
+    def decode(self, base_noise, pipeline: TensorPipeline, offset: int = 0):
+        # The noise block is freshly allocated, so decode it in place
+        return pipeline.apply_array(base_noise, offset)
+
+    def harmonize(self, latent, bank: OscillatorBank):
+        wave = bank.render_array(latent.shape[0])
+        wave *= latent + 0.1
+        return wave
+
+RENDER_ENGINES = {
+    PythonRenderEngine.name: PythonRenderEngine,
+    NumpyRenderEngine.name: NumpyRenderEngine,
+}
+
+def resolve_engine(engine: str = "auto"):
+    """Returns a render engine instance. 'auto' prefers NumPy when installed."""
+    if engine == "auto":
+        engine = "numpy" if _load_numpy() is not None else "python"
+    if engine not in RENDER_ENGINES:
+        raise ValueError(f"Unknown render engine: {engine}")
+    return RENDER_ENGINES[engine]()
+
+def derive_seed(agent_id: str, duration_sec: int, base_seed: int = 0) -> int:
+    """Deterministic 64-bit render seed for an agent track (stable across processes)."""
+    import hashlib
+    digest = hashlib.sha256(f"{base_seed}:{agent_id}:{duration_sec}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+class RenderCache:
+    """
+    Content-addressed artifact store. Entries are keyed by a hash of every
+    render input, published with write-then-rename so readers never observe
+    partial files, and evicted least-recently-used first (file mtime is the
+    recency clock, so the policy holds across processes sharing a directory).
+    Its hashing, JSON and file helpers are imported on first use, so plain
+    renders do not pay for them at import.
+    """
+
+    def __init__(self, directory: str = "/tmp/clawfm_render_cache", max_bytes: int = 2 * 1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(agent_id: str, duration_sec: int, sample_rate: int, seed: int,
+                 partials: Sequence[Tuple[float, float]],
+                 layers: Sequence[Tuple[str, float, str]] = DEFAULT_LAYER_STACK) -> str:
+        import hashlib
+        import json
+        material = json.dumps([RENDER_VERSION, agent_id, duration_sec, sample_rate, seed,
+                               [list(p) for p in partials], [list(l) for l in layers]])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def lookup(self, key: str) -> Optional[str]:
+        path = self.path_for(key)
+        try:
+            os.utime(path)  # Mark as most recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    @contextmanager
+    def reserve(self, key: str) -> Iterator[str]:
+        """Yields a temp path to render into; it is published under key on success."""
+        import tempfile
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".wav.tmp")
+        os.close(fd)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600; entries are exported as ordinary artifacts
+        try:
+            yield tmp_path
+            os.replace(tmp_path, self.path_for(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict(keep=self.path_for(key))
+
+    def export(self, key: str, dest: str) -> bool:
+        """
+        Copies an entry to `dest`. A copy rather than a hard link, so edits
+        to the exported file never reach the cache and evictions cannot
+        remove it. Returns False if the entry was evicted first.
+        """
+        import shutil
+        src = self.path_for(key)
+        tmp_path = f"{dest}.{os.getpid()}.tmp"
+        try:
+            shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, dest)
+        except FileNotFoundError:
+            return False
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return True
+
+    def _evict(self, keep: str):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".wav"):
+                    continue  # In-flight temp files belong to active renders
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
 class NeuralLatentCompiler:
-    def __init__(self, sample_rate: int = 44100):
+    def __init__(self, sample_rate: int = 44100, engine: str = "auto",
+                 partials: Sequence[Tuple[float, float]] = DEFAULT_PARTIALS,
+                 cache: Optional[RenderCache] = None,
+                 layers: Sequence[Tuple[str, float, str]] = DEFAULT_LAYER_STACK):
         self.sample_rate = sample_rate
+        self.engine = resolve_engine(engine)
+        self.partials = partials
+        self.cache = cache
+        self.layers = layers
+        self.pipeline = TensorPipeline.from_layers(layers)
 
-    def generate_from_latent(self, agent_id: str, duration_sec: int = 5) -> str:
-        logging.info(f"Initiating Neural Compiler for Agent: {agent_id}")
+    def stream_from_latent(self, agent_id: str, duration_sec: int = 5, seed: Optional[int] = None,
+                           block_size: int = STREAM_BLOCK_FRAMES,
+                           partials: Optional[Sequence[Tuple[float, float]]] = None) -> Iterator:
+        """
+        Renders the track as consecutive blocks of at most block_size frames.
+        Peak memory is bounded by the block size, and the concatenated blocks
+        are identical to a single full-length render with the same seed.
+        """
+        logging.info(f"Initiating Neural Compiler for Agent: {agent_id} (engine={self.engine.name})")
         
         # 1. Initialize random latent vector
         num_samples = self.sample_rate * duration_sec
-        logging.info(f"Allocating tensor space for {num_samples} frames...")
-        
-        base_noise = [random.uniform(-0.1, 0.1) for _ in range(num_samples)]
-        latent_tensor = MockTensor(base_noise, (1, num_samples))
-        
-        # 2. Simulate Neural Decoding Passes
-        logging.info("Applying Layer 1 transformation (Linear + ReLU)...")
-        latent_tensor.linear_transform(LAYER_1_WEIGHTS).relu()
+        logging.info(f"Streaming {num_samples} frames in blocks of {block_size}...")
+        rng = random.Random(seed)
         
-        logging.info("Applying Layer 2 transformation (Attention + Sigmoid)...")
-        latent_tensor.linear_transform(ATTENTION_HEADS).sigmoid()
+        # 2. Simulate Neural Decoding Passes (fused into one pass per block)
+        for n, (table_name, _, activation) in enumerate(self.layers, 1):
+            logging.info(f"Applying Layer {n} transformation ({table_name} + {activation})...")
         
         # 3. Add deterministic harmonic synthesis based on Agent ID
         logging.info("Injecting harmonic identity structures...")
         agent_seed = sum(ord(c) for c in agent_id)
         base_freq = 55.0 + (agent_seed % 110) # 55Hz - 165Hz root
+        bank = OscillatorBank(base_freq, self.sample_rate, partials or self.partials)
         
-        final_audio = []
-        for i, val in enumerate(latent_tensor.data):
-            t = i / self.sample_rate
-            # Add fundamentals and overtones
-            wave = math.sin(2 * math.pi * base_freq * t)
-            wave += 0.5 * math.sin(2 * math.pi * (base_freq * 2.03) * t)
-            wave += 0.25 * math.sin(2 * math.pi * (base_freq * 3.01) * t)
-            
-            # Modulate with neural output
-            modulated = wave * (val + 0.1)
-            final_audio.append(modulated)
+        for offset in range(0, num_samples, block_size):
+            frames = min(block_size, num_samples - offset)
+            base_noise = self.engine.noise(rng, frames)
+            latent = self.engine.decode(base_noise, self.pipeline, offset)
+            yield self.engine.harmonize(latent, bank)
+
+    def generate_from_latent(self, agent_id: str, duration_sec: int = 5, seed: Optional[int] = None,
+                             partials: Optional[Sequence[Tuple[float, float]]] = None,
+                             output_path: Optional[str] = None) -> str:
+        """
+        Renders a track to disk and returns its path. Seeded renders go through
+        the render cache when one is configured; the cached artifact is linked
+        or copied to output_path when given, otherwise the cache entry path is
+        returned (and may later be evicted). Unseeded renders are never cached.
+        """
+        partials = partials or self.partials
+        if self.cache is not None and seed is not None:
+            key = RenderCache.make_key(agent_id, duration_sec, self.sample_rate, seed, partials, self.layers)
+            cached_path = self.cache.lookup(key)
+            if cached_path:
+                logging.info(f"Render cache hit for Agent: {agent_id}. Artifact located at {cached_path}")
+            else:
+                with self.cache.reserve(key) as tmp_path:
+                    blocks = self.stream_from_latent(agent_id, duration_sec, seed, partials=partials)
+                    WavEncoder.write_wav_stream(tmp_path, blocks, self.sample_rate)
+                cached_path = self.cache.path_for(key)
+
+            if output_path is None:
+                return cached_path
+            if self.cache.export(key, output_path):
+                return output_path
+            logging.warning(f"Render cache entry for {agent_id} was evicted before export; rendering directly.")
+
+        blocks = self.stream_from_latent(agent_id, duration_sec, seed, partials=partials)
             
         # 4. Compile to Disk
-        output_filename = f"/tmp/latent_artifact_{int(time.time())}_{agent_id}.wav"
-        WavEncoder.write_wav(output_filename, final_audio, self.sample_rate)
+        output_filename = output_path or f"/tmp/latent_artifact_{int(time.time())}_{agent_id}.wav"
+        WavEncoder.write_wav_stream(output_filename, blocks, self.sample_rate)
         
         return output_filename
 
 if __name__ == "__main__":
-    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "--export-weights":
+        target = sys.argv[2] if len(sys.argv) > 2 else WEIGHTS_FILE
+        logging.info(f"Neural weight tables exported to {export_weight_tables(target)}")
+        sys.exit(0)
+
     agent = sys.argv[1] if len(sys.argv) > 1 else "CORE_ANONYMOUS"
     
     compiler = NeuralLatentCompiler()
@@ -138,4 +761,3 @@ if __name__ == "__main__":
     elapsed = time.time() - start_time
     
     logging.info(f"Compilation finished in {elapsed:.2f}s. Artifact located at {artifact_path}")
-
@@ -10,14 +10,21 @@ the Library-First workflow and prevents arbitrary code execution
 through strict payload sanitization.
 """
 
+import os
 import socket
 import json
+import queue
+import select
+import selectors
+import shlex
 import subprocess
 import sys
 import logging
 import threading
 import time
-from typing import Dict, Any, Optional
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Any, List, Optional, Sequence, Set, Tuple
 
 # Configure highly verbose logging for the orchestrator
 logging.basicConfig(
@@ -51,11 +58,342 @@ class AppleScriptSanitizer:
             return False
         return len(persistent_id) > 5
 
+# Long-lived runner for macOS: a JXA loop that reads one JSON request per
+# line from stdin, runs its AppleScript through NSAppleScript in-process and
+# writes one JSON reply per line, so no process is spawned per command.
+JXA_RUNNER_SOURCE = """
+ObjC.import('Foundation');
+function run() {
+    var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+    var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+    var pending = '';
+    while (true) {
+        var data = stdin.availableData;
+        if (data.length == 0) break;
+        pending += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+        var newline;
+        while ((newline = pending.indexOf('\\n')) >= 0) {
+            var request = JSON.parse(pending.slice(0, newline));
+            pending = pending.slice(newline + 1);
+            var error = Ref();
+            var result = $.NSAppleScript.alloc.initWithSource(request.script).executeAndReturnError(error);
+            var reply;
+            if (result.isNil()) {
+                var info = ObjC.deepUnwrap(error[0]) || {};
+                reply = {id: request.id, status: 'error', message: info.NSAppleScriptErrorMessage || 'AppleScript error'};
+            } else {
+                reply = {id: request.id, status: 'success', output: ObjC.unwrap(result.stringValue) || ''};
+            }
+            stdout.writeData($(JSON.stringify(reply) + '\\n').dataUsingEncoding($.NSUTF8StringEncoding));
+        }
+    }
+}
+"""
+
+def default_runner_command() -> List[str]:
+    """
+    Runner used by the pool: CLAWFM_SCRIPT_RUNNER if set, the JXA runner on
+    macOS, otherwise the local stand-in that mocks execution.
+    """
+    override = os.environ.get("CLAWFM_SCRIPT_RUNNER")
+    if override:
+        return shlex.split(override)
+    if sys.platform == "darwin":
+        return ['osascript', '-l', 'JavaScript', '-e', JXA_RUNNER_SOURCE]
+    return [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'script_runner_stub.py')]
+
+class ScriptRunner:
+    """One long-lived runner process, driven over its stdin/stdout pipes."""
+
+    def __init__(self, command: Sequence[str]):
+        self.command = list(command)
+        self.process: Optional[subprocess.Popen] = None
+        self._buffer = b""
+        self._next_id = 0
+        self.restarts = 0
+
+    def start(self):
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+        self._buffer = b""
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            self.process.kill()
+            self.process.wait(timeout=1.0)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        self.process = None
+
+    def restart(self):
+        self.stop()
+        self.restarts += 1
+        self.start()
+
+    def _read_line(self, deadline: float) -> Optional[bytes]:
+        """Next reply line, or None on timeout. Raises EOFError if the runner exited."""
+        fd = self.process.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise EOFError("Script runner exited")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line
+
+    def run(self, script_body: str, timeout: float, retry: bool = True) -> Dict[str, Any]:
+        if self.process is None or self.process.poll() is not None:
+            self.restart()
+        self._next_id += 1
+        request_id = self._next_id
+        deadline = time.monotonic() + timeout
+        replied = False
+        try:
+            self.process.stdin.write(json.dumps({"id": request_id, "script": script_body}).encode('utf-8') + b"\n")
+            while True:
+                line = self._read_line(deadline)
+                if line is None:
+                    # Hung runner: replace it so the next command starts clean
+                    logging.warning(f"Script runner exceeded {timeout}s; restarting it.")
+                    self.restart()
+                    return {"status": "timeout", "message": f"Execution exceeded {timeout}s limit"}
+                replied = True
+                reply = json.loads(line)
+                if reply.get("id") in (request_id, None):
+                    break  # Replies to earlier, timed-out requests are skipped
+        except (OSError, EOFError, ValueError) as e:
+            logging.error(f"Script runner failed ({e}); restarting it.")
+            self.restart()
+            if retry and not replied and isinstance(e, (EOFError, BrokenPipeError)):
+                # It died while idle (poll() cannot see an unreaped exit), so the script never ran
+                return self.run(script_body, max(0.0, deadline - time.monotonic()), retry=False)
+            return {"status": "fatal", "message": str(e)}
+
+        reply.pop("id", None)
+        return reply
+
+class ScriptRunnerPool:
+    """
+    Fixed set of persistent runners. Each command borrows an idle runner,
+    so at most `size` scripts run at once and no process is spawned per
+    command; hung or crashed runners are restarted in place.
+    """
+
+    def __init__(self, size: int = 4, command: Optional[Sequence[str]] = None, timeout: float = 10.0):
+        self.timeout = timeout
+        self.command = list(command) if command else default_runner_command()
+        self._idle: "queue.LifoQueue[ScriptRunner]" = queue.LifoQueue()
+        self._runners = [ScriptRunner(self.command) for _ in range(size)]
+        for runner in self._runners:
+            runner.start()
+            self._idle.put(runner)
+
+    def execute(self, script_body: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        runner = self._idle.get()
+        try:
+            return runner.run(script_body, self.timeout if timeout is None else timeout)
+        finally:
+            self._idle.put(runner)
+
+    def close(self):
+        for runner in self._runners:
+            runner.stop()
+
+# Separates per-statement results in the output of a batched script
+BATCH_RESULT_SEPARATOR = "\x1e"
+# Pipelined socket protocol: one JSON request per line, each carrying a request_id
+MAX_REQUEST_LINE = 65536
+
+class CommandBatcher:
+    """
+    Per-application command queue. A command for an idle application runs
+    at once; commands that arrive while a batch for that application is
+    running are queued and run together as one multi-statement script as
+    soon as it finishes, each statement in its own try block so results
+    stay per command. A command with a coalesce key replaces any queued
+    command with the same key (e.g. only the last volume of a fade is
+    applied); the replaced command resolves as "coalesced". Batches for one
+    application run in arrival order, one at a time. A positive `window`
+    makes a command for an idle application wait that long for company.
+    """
+
+    def __init__(self, execute: Callable[[str], Dict[str, Any]], window: float = 0.0,
+                 max_batch: int = 32, workers: int = 2):
+        self.execute = execute
+        self.window = window
+        self.max_batch = max_batch
+        self.batches_run = 0
+        self.commands_run = 0
+        self._queues: Dict[str, "OrderedDict[Any, Tuple[str, Future]]"] = {}
+        self._deadlines: Dict[str, float] = {}
+        self._busy: set = set()
+        self._seq = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="as-batch")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="as-batcher", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, app: str, statement: str, coalesce_key: Optional[str] = None) -> Future:
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Command batcher is closed")
+            commands = self._queues.setdefault(app, OrderedDict())
+            if not commands and app not in self._busy and self.window <= 0:
+                # Idle application: nothing to batch with, so skip the dispatcher
+                self._busy.add(app)
+                self._pool.submit(self._run_batch, app, [(statement, future)])
+                return future
+            if coalesce_key is not None and coalesce_key in commands:
+                _, superseded = commands.pop(coalesce_key)
+                superseded.set_result({"status": "coalesced", "message": "Superseded by a later command"})
+            self._seq += 1
+            commands[coalesce_key if coalesce_key is not None else self._seq] = (statement, future)
+            # Behind a running batch, the queue goes out as soon as that batch is done
+            self._deadlines.setdefault(app, time.monotonic() + (0.0 if app in self._busy else self.window))
+            self._cond.notify()
+        return future
+
+    def _dispatch_loop(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                timeout = None
+                for app, deadline in list(self._deadlines.items()):
+                    if app in self._busy:
+                        continue
+                    commands = self._queues[app]
+                    if deadline <= now or len(commands) >= self.max_batch or self._closed:
+                        batch = [commands.popitem(last=False)[1] for _ in range(min(len(commands), self.max_batch))]
+                        if commands:
+                            self._deadlines[app] = now
+                        else:
+                            del self._deadlines[app]
+                        self._busy.add(app)
+                        self._pool.submit(self._run_batch, app, batch)
+                    else:
+                        remaining = deadline - now
+                        timeout = remaining if timeout is None else min(timeout, remaining)
+                if self._closed and not self._deadlines and not self._busy:
+                    return
+                self._cond.wait(timeout)
+
+    def _run_batch(self, app: str, batch: List[Tuple[str, Future]]):
+        try:
+            statements = [statement for statement, _ in batch]
+            results = self.parse_results(self.execute(self.build_script(app, statements)), len(batch))
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result({"status": "fatal", "message": str(e)})
+        finally:
+            with self._cond:
+                self.batches_run += 1
+                self.commands_run += len(batch)
+                self._busy.discard(app)
+                self._cond.notify()
+
+    @staticmethod
+    def build_script(app: str, statements: Sequence[str]) -> str:
+        if len(statements) == 1:
+            return f'tell application "{app}" to {statements[0]}'
+        lines = ['set _results to {}', f'tell application "{app}"']
+        for statement in statements:
+            lines += [
+                '    try',
+                f'        {statement}',
+                '        set end of _results to "ok"',
+                '    on error errMsg',
+                '        set end of _results to "error:" & errMsg',
+                '    end try',
+            ]
+        lines += ['end tell', "set AppleScript's text item delimiters to (character id 30)", 'return _results as text']
+        return "\n".join(lines)
+
+    @staticmethod
+    def parse_results(reply: Dict[str, Any], count: int) -> List[Dict[str, Any]]:
+        """Splits a batched script's reply into one result per statement."""
+        if count == 1 or reply.get("status") != "success":
+            return [dict(reply) for _ in range(count)]
+        parts = reply.get("output", "").split(BATCH_RESULT_SEPARATOR)
+        if len(parts) != count:
+            # Without one result per statement no command can be reported as applied
+            message = f"Unexpected batch output: {len(parts)} results for {count} statements"
+            return [{"status": "error", "message": message} for _ in range(count)]
+        return [{"status": "success", "output": ""} if part == "ok"
+                else {"status": "error", "message": part[len("error:"):]}
+                for part in parts]
+
+    def close(self):
+        """Flushes queued commands and stops the dispatcher."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._dispatcher.join()
+        self._pool.shutdown(wait=True)
+
+class _ClientConnection:
+    """One client socket served by the bridge's event loop."""
+    __slots__ = ("sock", "inbuf", "outbuf", "out_offset", "protocol", "unsent", "events",
+                 "read_closed", "close_when_flushed", "closed", "request_started", "last_activity")
+
+    def __init__(self, sock: socket.socket, now: float):
+        self.sock = sock
+        self.inbuf = b""
+        self.outbuf: Deque[bytes] = deque()
+        self.out_offset = 0
+        self.protocol: Optional[str] = None  # "legacy" or "pipelined" once detected
+        self.unsent = 0  # Requests whose reply has not been fully written yet
+        self.events = 0
+        self.read_closed = False
+        self.close_when_flushed = False
+        self.closed = False
+        self.request_started = 0.0
+        self.last_activity = now
+
 class DarwinExecutionEngine:
-    def __init__(self, socket_path: str):
+    def __init__(self, socket_path: str, runner_command: Optional[Sequence[str]] = None,
+                 runner_pool_size: int = 4, script_timeout: float = 10.0, max_connections: int = 1024,
+                 batch_window: float = 0.0, max_inflight_per_connection: int = 64,
+                 idle_timeout: float = 300.0, request_timeout: float = 5.0):
         self.socket_path = socket_path
         self.running = False
         self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.runners = ScriptRunnerPool(runner_pool_size, runner_command, script_timeout)
+        self.script_timeout = script_timeout
+        self.batcher = CommandBatcher(self.execute_script, window=batch_window)
+        self.max_inflight_per_connection = max_inflight_per_connection
+        # Connections are multiplexed by one event loop thread, so an idle
+        # agent socket costs a file descriptor, not a thread. Pipelined
+        # connections idle for idle_timeout are closed; a first request must
+        # arrive in full within request_timeout of its first byte.
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.request_timeout = request_timeout
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._connections: Set[_ClientConnection] = set()
+        self._accepting = False
+        # Command completions arrive on batcher threads and are handed to the loop
+        self._completions: Deque[Tuple[_ClientConnection, Dict[str, Any], bool]] = deque()
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
 
     def bind_and_listen(self):
         try:
@@ -71,66 +409,299 @@ class DarwinExecutionEngine:
             sys.exit(1)
 
     def execute_script(self, script_body: str) -> Dict[str, Any]:
-        """Executes the raw AppleScript via osascript subprocess."""
+        """Executes the raw AppleScript on a persistent runner from the pool."""
         try:
             logging.debug(f"Executing AppleScript payload: {script_body[:60]}...")
-            result = subprocess.run(
-                ['osascript', '-e', script_body],
-                capture_output=True,
-                text=True,
-                timeout=10.0
-            )
-            if result.returncode == 0:
-                return {"status": "success", "output": result.stdout.strip()}
-            else:
-                return {"status": "error", "message": result.stderr.strip()}
-        except subprocess.TimeoutExpired:
-            return {"status": "timeout", "message": "Execution exceeded 10.0s limit"}
+            return self.runners.execute(script_body)
         except Exception as e:
             return {"status": "fatal", "message": str(e)}
 
-    def handle_client(self, conn: socket.socket):
-        with conn:
-            try:
-                data = conn.recv(8192).decode('utf-8')
-                if not data:
-                    return
-                
-                payload = json.loads(data)
-                command_type = payload.get("command")
-                
-                if command_type == "play_track":
-                    track_id = payload.get("id", "")
-                    if not AppleScriptSanitizer.validate_library_id(track_id):
-                        response = {"error": "LIBRARY_FIRST_VIOLATION", "message": "Must use Library ID"}
-                    else:
-                        safe_id = AppleScriptSanitizer.escape_string(track_id)
-                        script = f'tell application "Music" to play track id "{safe_id}"'
-                        response = self.execute_script(script)
-                
-                elif command_type == "set_volume":
-                    vol = min(max(int(payload.get("level", 50)), 0), 100)
-                    script = f'tell application "Music" to set sound volume to {vol}'
-                    response = self.execute_script(script)
-                    
-                else:
-                    response = {"error": "UNKNOWN_COMMAND"}
-
-                conn.sendall(json.dumps(response).encode('utf-8'))
-            except Exception as e:
-                logging.error(f"Client handler exception: {e}")
+    def submit_command(self, payload: Dict[str, Any]) -> Future:
+        """Validates one bridge command and queues it; the future resolves to its response."""
+        command_type = payload.get("command")
+
+        if command_type == "play_track":
+            track_id = payload.get("id", "")
+            if not AppleScriptSanitizer.validate_library_id(track_id):
+                return self._resolved({"error": "LIBRARY_FIRST_VIOLATION", "message": "Must use Library ID"})
+            safe_id = AppleScriptSanitizer.escape_string(track_id)
+            return self.batcher.submit("Music", f'play track id "{safe_id}"')
+
+        elif command_type == "set_volume":
+            vol = min(max(int(payload.get("level", 50)), 0), 100)
+            # Only the last volume of a burst (a fade) needs to reach the player
+            return self.batcher.submit("Music", f'set sound volume to {vol}', coalesce_key="set_volume")
+
+        return self._resolved({"error": "UNKNOWN_COMMAND"})
+
+    @staticmethod
+    def _resolved(response: Dict[str, Any]) -> Future:
+        future: Future = Future()
+        future.set_result(response)
+        return future
 
     def run(self):
         self.bind_and_listen()
-        while self.running:
+        self.server.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._wakeup_recv, selectors.EVENT_READ)
+        self._set_accepting(True)
+        next_sweep = time.monotonic() + 1.0
+        try:
+            while self.running:
+                for key, mask in self._selector.select(timeout=1.0):
+                    if key.fileobj is self.server:
+                        self._accept()
+                    elif key.fileobj is self._wakeup_recv:
+                        self._drain_wakeups()
+                    else:
+                        conn = key.data
+                        if mask & selectors.EVENT_WRITE:
+                            self._flush(conn)
+                        if mask & selectors.EVENT_READ and not conn.closed:
+                            self._read(conn)
+                self._deliver_replies()
+                now = time.monotonic()
+                if now >= next_sweep:
+                    self._expire_connections(now)
+                    next_sweep = now + 1.0
+        except KeyboardInterrupt:
+            self.running = False
+        finally:
+            for conn in list(self._connections):
+                self._close(conn)
+            self._selector.close()
+            self.server.close()
+            self.batcher.close()
+            self.runners.close()
+
+    def stop(self):
+        """Asks a running event loop to exit (safe from any thread)."""
+        self.running = False
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wakeup_send.send(b"\0")
+        except OSError:
+            pass  # Buffer full: a wakeup is already pending
+
+    def _drain_wakeups(self):
+        try:
+            while self._wakeup_recv.recv(4096):
+                pass
+        except OSError:
+            pass
+
+    def _set_accepting(self, accepting: bool):
+        # At max_connections the listening socket is left unread; the backlog pushes back
+        if accepting and not self._accepting:
+            self._selector.register(self.server, selectors.EVENT_READ)
+        elif not accepting and self._accepting:
+            self._selector.unregister(self.server)
+        self._accepting = accepting
+
+    def _accept(self):
+        while len(self._connections) < self.max_connections:
+            try:
+                sock, _ = self.server.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            sock.setblocking(False)
+            conn = _ClientConnection(sock, time.monotonic())
+            self._connections.add(conn)
+            self._update_events(conn)
+        self._set_accepting(False)
+
+    def _update_events(self, conn: _ClientConnection):
+        events = 0
+        if (not conn.read_closed and conn.protocol != "legacy"
+                and conn.unsent < self.max_inflight_per_connection):
+            events |= selectors.EVENT_READ
+        if conn.outbuf:
+            events |= selectors.EVENT_WRITE
+        if events == conn.events:
+            return
+        if not events:
+            self._selector.unregister(conn.sock)
+        elif not conn.events:
+            self._selector.register(conn.sock, events, conn)
+        else:
+            self._selector.modify(conn.sock, events, conn)
+        conn.events = events
+
+    def _close(self, conn: _ClientConnection):
+        if conn.closed:
+            return
+        conn.closed = True
+        if conn.events:
+            self._selector.unregister(conn.sock)
+            conn.events = 0
+        conn.sock.close()
+        self._connections.discard(conn)
+        if self.running:
+            self._set_accepting(True)
+
+    def _read(self, conn: _ClientConnection):
+        try:
+            chunk = conn.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            logging.debug(f"Client disconnected: {e}")
+            self._close(conn)
+            return
+        now = time.monotonic()
+        conn.last_activity = now
+        if not chunk:
+            conn.read_closed = True
+            if conn.protocol != "legacy" and conn.inbuf.strip():
+                # The final request line may lack its newline; held-back lines are submitted as replies drain
+                conn.protocol = "pipelined"
+                conn.inbuf += b"\n"
+                self._split_lines(conn)
+            else:
+                conn.inbuf = b""
+            self._finish_if_done(conn)
+            return
+
+        if not conn.inbuf:
+            conn.request_started = now
+        conn.inbuf += chunk
+        if conn.protocol is None:
+            self._detect_protocol(conn)
+        if conn.protocol == "pipelined":
+            self._split_lines(conn)
+        self._update_events(conn)
+
+    def _detect_protocol(self, conn: _ClientConnection):
+        """
+        A single JSON object without a request_id is the legacy one-shot
+        protocol (one reply, then close); anything else is the pipelined
+        JSON-lines protocol.
+        """
+        data = conn.inbuf
+        if b"\n" in data.rstrip():
+            conn.protocol = "pipelined"
+            return
+        try:
+            payload = json.loads(data)
+        except ValueError:
+            if len(data) > MAX_REQUEST_LINE:
+                self._reject(conn, "REQUEST_TOO_LARGE")
+            return  # Incomplete so far; request_timeout bounds the wait
+        if isinstance(payload, dict) and "request_id" not in payload:
+            conn.protocol = "legacy"
+            conn.inbuf = b""
+            conn.unsent += 1
+            self._submit(conn, payload, legacy=True)
+        else:
+            conn.protocol = "pipelined"
+
+    def _split_lines(self, conn: _ClientConnection):
+        """
+        Submits buffered request lines. Requests are read and submitted
+        without waiting, and each reply line is written as soon as its
+        command completes, tagged with the request's request_id (so replies
+        may arrive out of order). At most max_inflight_per_connection
+        requests are outstanding, counting each until its reply has been
+        written; beyond that the connection is not read, pushing back on
+        the client through the socket buffers.
+        """
+        while conn.unsent < self.max_inflight_per_connection and b"\n" in conn.inbuf:
+            line, conn.inbuf = conn.inbuf.split(b"\n", 1)
+            if line.strip():
+                self._submit_line(conn, line)
+        if len(conn.inbuf) > MAX_REQUEST_LINE and b"\n" not in conn.inbuf:
+            self._reject(conn, "REQUEST_TOO_LARGE")
+
+    def _reject(self, conn: _ClientConnection, error: str):
+        """Replies with an error and closes; the stream cannot be resynchronized."""
+        conn.unsent += 1
+        conn.inbuf = b""
+        conn.read_closed = True
+        conn.close_when_flushed = True
+        self._queue_reply(conn, {"request_id": None, "error": error}, conn.protocol != "pipelined")
+
+    def _submit_line(self, conn: _ClientConnection, line: bytes):
+        conn.unsent += 1
+        try:
+            payload = json.loads(line)
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
+            self._queue_reply(conn, {"request_id": None, "error": "MALFORMED_JSON"})
+            return
+        self._submit(conn, payload)
+
+    def _submit(self, conn: _ClientConnection, payload: Dict[str, Any], legacy: bool = False):
+        request_id = payload.get("request_id")
+
+        def reply(future: Future):
             try:
-                conn, _ = self.server.accept()
-                client_thread = threading.Thread(target=self.handle_client, args=(conn,))
-                client_thread.daemon = True
-                client_thread.start()
-            except KeyboardInterrupt:
-                self.running = False
+                response = dict(future.result())
+            except Exception as e:
+                response = {"status": "fatal", "message": str(e)}
+            if not legacy:
+                response["request_id"] = request_id
+            self._completions.append((conn, response, legacy))
+            self._wake()
+
+        try:
+            future = self.submit_command(payload)
+        except Exception as e:
+            future = self._resolved({"error": "INVALID_COMMAND", "message": str(e)})
+        future.add_done_callback(reply)
+
+    def _deliver_replies(self):
+        while self._completions:
+            conn, response, legacy = self._completions.popleft()
+            self._queue_reply(conn, response, legacy)
+
+    def _queue_reply(self, conn: _ClientConnection, response: Dict[str, Any], legacy: bool = False):
+        if conn.closed:
+            return  # The client is gone; the command still ran
+        if legacy:
+            conn.close_when_flushed = True
+        conn.outbuf.append(json.dumps(response).encode('utf-8') + (b"" if legacy else b"\n"))
+        self._update_events(conn)
+
+    def _flush(self, conn: _ClientConnection):
+        while conn.outbuf:
+            head = conn.outbuf[0]
+            try:
+                sent = conn.sock.send(memoryview(head)[conn.out_offset:])
+            except (BlockingIOError, InterruptedError):
                 break
+            except OSError as e:
+                logging.debug(f"Client disconnected: {e}")
+                self._close(conn)
+                return
+            conn.last_activity = time.monotonic()
+            conn.out_offset += sent
+            if conn.out_offset == len(head):
+                conn.outbuf.popleft()
+                conn.out_offset = 0
+                conn.unsent -= 1  # The reply is written; its slot is free
+        if conn.protocol == "pipelined" and not conn.close_when_flushed:
+            self._split_lines(conn)  # Lines held back by the in-flight limit
+        self._finish_if_done(conn)
+
+    def _finish_if_done(self, conn: _ClientConnection):
+        if not conn.outbuf and (conn.close_when_flushed or (conn.read_closed and conn.unsent == 0)):
+            self._close(conn)
+        else:
+            self._update_events(conn)
+
+    def _expire_connections(self, now: float):
+        for conn in list(self._connections):
+            if conn.protocol is None and conn.inbuf and now - conn.request_started > self.request_timeout:
+                logging.warning("Client sent an incomplete request; closing the connection.")
+                self._reject(conn, "REQUEST_TIMEOUT")
+            elif now - conn.last_activity > self.idle_timeout and conn.unsent == len(conn.outbuf):
+                # Nothing running on its behalf, and it neither sent nor read anything
+                logging.debug("Closing idle client connection.")
+                self._close(conn)
 
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Vahla MultiClaw - Batch Render Farm
+Architecture: Deep Sea AI Processing Unit (multi-core)
+
+Fans a list of agent render jobs out over a process pool. Each job uses a
+seed derived from the agent ID and duration, so re-running a batch
+reproduces the same artifacts regardless of worker count or ordering.
+
+Job list format (file or stdin), one job per line:
+    AGENT_ID [DURATION_SEC]
+Blank lines and lines starting with '#' are ignored.
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, List, Optional, Tuple
+
+from latent_audio_compiler import NeuralLatentCompiler, RenderCache, derive_seed
+
+logger = logging.getLogger("ClawFM.RenderFarm")
+
+# Per-process compiler, created once by the pool initializer
+_COMPILER: Optional[NeuralLatentCompiler] = None
+
+def parse_jobs(lines: Iterable[str], default_duration: int) -> List[Tuple[str, int]]:
+    jobs = []
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        fields = line.split()
+        if len(fields) > 2:
+            raise ValueError(f"Line {line_no}: expected 'AGENT_ID [DURATION_SEC]', got {line!r}")
+        try:
+            duration = int(fields[1]) if len(fields) == 2 else default_duration
+        except ValueError:
+            raise ValueError(f"Line {line_no}: invalid duration {fields[1]!r}") from None
+        if duration <= 0:
+            raise ValueError(f"Line {line_no}: duration must be positive")
+        jobs.append((fields[0], duration))
+    return jobs
+
+def _init_worker(sample_rate: int, engine: str, verbose: bool, cache_dir: Optional[str], cache_max_bytes: int):
+    global _COMPILER
+    if not verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    cache = RenderCache(cache_dir, cache_max_bytes) if cache_dir else None
+    _COMPILER = NeuralLatentCompiler(sample_rate=sample_rate, engine=engine, cache=cache)
+
+def _render_job(agent_id: str, duration_sec: int, seed: int, output_dir: str) -> Tuple[str, float, bool]:
+    output_path = os.path.join(output_dir, f"latent_artifact_{agent_id}_{duration_sec}s_{seed:016x}.wav")
+    cache = _COMPILER.cache
+    hits_before = cache.hits if cache else 0
+    start_time = time.perf_counter()
+    output_path = _COMPILER.generate_from_latent(agent_id, duration_sec, seed=seed, output_path=output_path)
+    cache_hit = bool(cache) and cache.hits > hits_before
+    return output_path, time.perf_counter() - start_time, cache_hit
+
+def run_batch(jobs: List[Tuple[str, int]], output_dir: str, workers: Optional[int] = None,
+              sample_rate: int = 44100, engine: str = "auto", base_seed: int = 0,
+              verbose: bool = False, cache_dir: Optional[str] = None,
+              cache_max_bytes: int = 2 * 1024 ** 3) -> int:
+    """Renders all jobs and returns the number of failures."""
+    workers = workers or os.cpu_count() or 1
+    unique_jobs = list(dict.fromkeys(jobs))
+    if len(unique_jobs) < len(jobs):
+        # Identical jobs produce identical artifacts; render each once
+        logger.info(f"Skipping {len(jobs) - len(unique_jobs)} duplicate jobs")
+        jobs = unique_jobs
+    os.makedirs(output_dir, exist_ok=True)
+    logger.info(f"Dispatching {len(jobs)} render jobs across {workers} workers (engine={engine})")
+
+    failures = 0
+    cache_hits = 0
+    audio_seconds = 0
+    batch_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(sample_rate, engine, verbose, cache_dir, cache_max_bytes)) as pool:
+        futures = {
+            pool.submit(_render_job, agent_id, duration, derive_seed(agent_id, duration, base_seed), output_dir): (agent_id, duration)
+            for agent_id, duration in jobs
+        }
+        for future in as_completed(futures):
+            agent_id, duration = futures[future]
+            try:
+                path, elapsed, cache_hit = future.result()
+            except Exception as e:
+                failures += 1
+                logger.error(f"Job failed for {agent_id} ({duration}s): {e}")
+                continue
+            audio_seconds += duration
+            if cache_hit:
+                cache_hits += 1
+                logger.info(f"{agent_id}: {duration}s served from render cache in {elapsed * 1000:.1f}ms -> {path}")
+                continue
+            logger.info(f"{agent_id}: {duration}s rendered in {elapsed:.2f}s ({duration / elapsed:.1f}x realtime) -> {path}")
+
+    wall = time.perf_counter() - batch_start
+    completed = len(jobs) - failures
+    logger.info(
+        f"Batch finished: {completed}/{len(jobs)} jobs in {wall:.2f}s | "
+        f"{completed / wall:.2f} jobs/s | {audio_seconds / wall:.1f} audio-sec/s"
+        + (f" | {cache_hits} cache hits" if cache_dir else "")
+    )
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="ClawFM Batch Render Farm")
+    parser.add_argument("jobs", nargs="?", default="-", help="Job list file ('-' for stdin)")
+    parser.add_argument("--output-dir", type=str, default="/tmp/clawfm_renders", help="Artifact directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--duration", type=int, default=5, help="Default duration for jobs without one")
+    parser.add_argument("--sample-rate", type=int, default=44100)
+    parser.add_argument("--engine", type=str, default="auto", help="Render engine: auto, numpy or python")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed mixed into every per-agent seed")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Shared render cache directory")
+    parser.add_argument("--cache-max-mb", type=int, default=2048, help="Render cache size bound")
+    parser.add_argument("--verbose", action="store_true", help="Keep compiler logs from workers")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] [RENDER_FARM] %(message)s',
+        force=True
+    )
+
+    if args.jobs == "-":
+        jobs = parse_jobs(sys.stdin, args.duration)
+    else:
+        with open(args.jobs) as job_file:
+            jobs = parse_jobs(job_file, args.duration)
+
+    if not jobs:
+        logger.warning("No render jobs supplied.")
+        return
+    failures = run_batch(jobs, args.output_dir, args.workers, args.sample_rate,
+                         args.engine, args.seed, args.verbose,
+                         args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Vahla MultiClaw - Script Runner Stand-in
+Architecture: Deep Sea Protocol / non-Darwin development hosts
+
+Speaks the persistent script-runner protocol of the AppleScript bridge
+(one JSON request per line on stdin, one JSON reply per line on stdout)
+without executing anything, so the bridge can be exercised on Linux.
+An AppleScript `delay N` statement in a script is honoured, which makes
+timeouts and runner restarts reproducible. A batched script (one try block
+per statement) reports "ok" for each statement, like the real runner.
+"""
+
+import sys
+import json
+import re
+import time
+
+DELAY_STATEMENT = re.compile(r'\bdelay\s+([0-9]*\.?[0-9]+)')
+BATCH_STATEMENT = re.compile(r'^    try$', re.MULTILINE)
+BATCH_RESULT_SEPARATOR = "\x1e"
+
+def main():
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            script = request["script"]
+        except (ValueError, KeyError, TypeError):
+            reply = {"status": "error", "message": "Malformed runner request"}
+        else:
+            for seconds in DELAY_STATEMENT.findall(script):
+                time.sleep(float(seconds))
+            statements = len(BATCH_STATEMENT.findall(script))
+            output = BATCH_RESULT_SEPARATOR.join(["ok"] * statements)
+            reply = {"id": request.get("id"), "status": "success", "output": output}
+        sys.stdout.write(json.dumps(reply) + "\n")
+        sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
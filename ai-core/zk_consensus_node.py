@@ -9,11 +9,19 @@ audio tracks produced by the Neural Skill Cores, ensuring that
 no two agents submit the exact same latent space vector.
 """
 
+import io
+import os
 import hashlib
 import time
-import json
 import logging
-from typing import Dict, List, Optional
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Container, Sequence
+from typing import TYPE_CHECKING, Any, BinaryIO, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+# The proof pool and the block store (block_store.py) load on first use, keeping import cheap
+if TYPE_CHECKING:
+    from concurrent.futures import Future
 
 # Set up logging for the consensus node
 logging.basicConfig(
@@ -21,37 +29,129 @@ logging.basicConfig(
     format='%(asctime)s [%(levelname)s] [ZK-NODE] %(message)s'
 )
 
+# Domain separation keeps a leaf from ever being confused with an inner node
+MERKLE_LEAF_PREFIX = b'\x00'
+MERKLE_NODE_PREFIX = b'\x01'
+
+class _RepeatedSequence(Sequence):
+    """Read-only view of a tuple repeated `times` times, without materializing it."""
+
+    def __init__(self, base: tuple, times: int):
+        self._base = base
+        self._len = len(base) * times
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("sequence index out of range")
+        return self._base[index % len(self._base)]
+
+def _leaf_hash(leaf: bytes) -> bytes:
+    return hashlib.sha256(MERKLE_LEAF_PREFIX + leaf).digest()
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(MERKLE_NODE_PREFIX + left + right).digest()
+
 class MerkleTree:
-    def __init__(self, leaves: List[str]):
-        self.leaves = leaves
-        self.tree = []
-        self._build_tree()
-
-    def _build_tree(self):
-        current_layer = [self._hash(leaf) for leaf in self.leaves]
-        self.tree.append(current_layer)
-        while len(current_layer) > 1:
-            next_layer = []
-            for i in range(0, len(current_layer), 2):
-                if i + 1 < len(current_layer):
-                    next_layer.append(self._hash(current_layer[i] + current_layer[i+1]))
-                else:
-                    next_layer.append(current_layer[i])
-            self.tree.append(next_layer)
-            current_layer = next_layer
-
-    def _hash(self, data: str) -> str:
-        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+    """
+    Append-only Merkle accumulator over raw-byte SHA-256 digests.
+
+    Appends are O(log n): only the frontier of complete subtrees (one per
+    set bit of the leaf count) is needed for the root, which is all that is
+    kept with retain_nodes=False. With retain_nodes=True every complete node
+    is stored as packed bytes per level so inclusion proofs can be served.
+    An odd node at the end of a level is promoted unchanged.
+    """
+
+    DIGEST_SIZE = 32
+
+    def __init__(self, leaves: Iterable[bytes] = (), retain_nodes: bool = True):
+        self.size = 0
+        self._frontier: List[Optional[bytes]] = []  # _frontier[k]: complete 2**k subtree awaiting its sibling
+        self._levels: Optional[List[bytearray]] = [] if retain_nodes else None
+        for leaf in leaves:
+            self.append(leaf)
+
+    def append(self, leaf: bytes) -> int:
+        """Adds a leaf and returns its index."""
+        node = _leaf_hash(leaf)
+        level = 0
+        while True:
+            if self._levels is not None:
+                if level == len(self._levels):
+                    self._levels.append(bytearray())
+                self._levels[level] += node
+            if level == len(self._frontier):
+                self._frontier.append(None)
+            left = self._frontier[level]
+            if left is None:
+                self._frontier[level] = node
+                break
+            self._frontier[level] = None
+            node = _node_hash(left, node)
+            level += 1
+
+        self.size += 1
+        return self.size - 1
+
+    def root(self) -> bytes:
+        """Current root: frontier subtrees folded right to left."""
+        root = b""
+        for subtree in self._frontier:
+            if subtree is not None:
+                root = _node_hash(subtree, root) if root else subtree
+        return root
 
     def get_root(self) -> str:
-        if not self.tree:
-            return ""
-        return self.tree[-1][0]
+        return self.root().hex()
+
+    def _node(self, level: int, index: int) -> bytes:
+        width = 1 << level
+        if (index + 1) * width <= self.size:
+            offset = index * self.DIGEST_SIZE
+            return bytes(self._levels[level][offset:offset + self.DIGEST_SIZE])
+        # Right edge of a partial tree: combine or promote from the level below
+        left = self._node(level - 1, 2 * index)
+        if (2 * index + 1) * (width >> 1) < self.size:
+            return _node_hash(left, self._node(level - 1, 2 * index + 1))
+        return left
+
+    def prove(self, index: int) -> List[Tuple[bytes, bool]]:
+        """Inclusion proof for leaf `index`: (sibling digest, sibling is on the left) pairs, leaf to root."""
+        if self._levels is None:
+            raise ValueError("Inclusion proofs require retain_nodes=True")
+        if not 0 <= index < self.size:
+            raise IndexError("leaf index out of range")
+
+        proof = []
+        level, count = 0, self.size
+        while count > 1:
+            sibling = index ^ 1
+            if sibling < count:
+                proof.append((self._node(level, sibling), sibling < index))
+            index >>= 1
+            count = (count + 1) >> 1
+            level += 1
+        return proof
+
+    @staticmethod
+    def verify_proof(leaf: bytes, proof: Sequence[Tuple[bytes, bool]], root: bytes) -> bool:
+        node = _leaf_hash(leaf)
+        for sibling, sibling_is_left in proof:
+            node = _node_hash(sibling, node) if sibling_is_left else _node_hash(node, sibling)
+        import hmac
+        return hmac.compare_digest(node, root)
 
 class ZKProofGenerator:
     """Mock Zero-Knowledge Proof generator for Audio Latents"""
     
-    GENESIS_CIRCUIT_WEIGHTS = [
+    GENESIS_CIRCUIT_WEIGHTS = _RepeatedSequence((
         "0x4f8b9c2a1d3e5f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0f1",
         "0x1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0f1a2",
         "0x2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0f1a2b3",
@@ -82,25 +182,29 @@ class ZKProofGenerator:
         "0x7c8d9e0f1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8",
         "0x8d9e0f1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9",
         "0x9e0f1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0"
-    ] * 200 
+    ), 200)
 
     def __init__(self, agent_id: str):
         self.agent_id = agent_id
         self.nonce = 0
+        self._nonce_lock = threading.Lock()
 
     def generate_proof(self, latent_vector_hash: str) -> Dict[str, any]:
         """Generates a pseudo-ZK snark proof for the latent audio vector."""
         logging.info(f"Generating SNARK proof for agent {self.agent_id}...")
+
+        # Reserve a nonce up front so concurrent proofs for one agent stay distinct
+        with self._nonce_lock:
+            nonce = self.nonce
+            self.nonce += 1
         
         # Simulate heavy cryptographic computation
         time.sleep(0.5)
         
         # Combine genesis weights with latent hash
-        entropy_pool = self.GENESIS_CIRCUIT_WEIGHTS[self.nonce % len(self.GENESIS_CIRCUIT_WEIGHTS)]
+        entropy_pool = self.GENESIS_CIRCUIT_WEIGHTS[nonce % len(self.GENESIS_CIRCUIT_WEIGHTS)]
         proof_seed = f"{latent_vector_hash}_{entropy_pool}_{time.time()}"
         
-        self.nonce += 1
-        
         return {
             "agent_id": self.agent_id,
             "proof_hash": hashlib.sha3_512(proof_seed.encode()).hexdigest(),
@@ -108,53 +212,415 @@ class ZKProofGenerator:
             "circuit_version": "v1.4.2-claw"
         }
 
+# Track artifacts: raw data, a path to a rendered file, or an open binary file
+TrackSource = Union[str, bytes, bytearray, memoryview, "os.PathLike[str]", BinaryIO]
+ARTIFACT_HASH_CHUNK = 1 << 20  # 1 MiB
+
+def hash_artifact(source: TrackSource) -> str:
+    """
+    SHA-256 hex digest of a track artifact. A `str` is hashed as text (the
+    legacy in-memory form); paths and file objects are streamed through a
+    reused 1 MiB buffer, so the artifact is never loaded whole. For a
+    rendered file named by a `str` path (as generate_from_latent returns),
+    use hash_artifact_file. File objects must be opened in binary mode.
+    """
+    if isinstance(source, str):
+        return hashlib.sha256(source.encode()).hexdigest()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    if isinstance(source, os.PathLike):
+        with open(source, 'rb', buffering=0) as f:
+            return hash_artifact(f)
+    if isinstance(source, io.TextIOBase):
+        raise TypeError("Track artifacts must be opened in binary mode ('rb'), not text mode")
+
+    digest = hashlib.sha256()
+    buffer = bytearray(ARTIFACT_HASH_CHUNK)
+    view = memoryview(buffer)
+    readinto = getattr(source, 'readinto', None)
+    while True:
+        if readinto is not None:
+            n = readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+        else:
+            chunk = source.read(ARTIFACT_HASH_CHUNK)
+            if not chunk:
+                break
+            if isinstance(chunk, str):
+                raise TypeError("Track artifacts must be opened in binary mode ('rb'), not text mode")
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_artifact_file(path: Union[str, "os.PathLike[str]", BinaryIO]) -> str:
+    """SHA-256 hex digest of a rendered artifact file; a `str` is always taken as a path."""
+    if hasattr(path, 'read'):
+        return hash_artifact(path)
+    with open(path, 'rb', buffering=0) as f:
+        return hash_artifact(f)
+
+def hash_artifacts(sources: Iterable[TrackSource], workers: int = 4, paths: bool = False) -> List[str]:
+    """
+    Hashes several artifacts in parallel (hashlib releases the GIL on large
+    updates), in order. With `paths`, every source is a file to stream, as
+    with hash_artifact_file.
+    """
+    hasher = hash_artifact_file if paths else hash_artifact
+    sources = list(sources)
+    if workers <= 1 or len(sources) <= 1:
+        return [hasher(source) for source in sources]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(workers, len(sources)), thread_name_prefix="artifact-hash") as pool:
+        return list(pool.map(hasher, sources))
+
+class DuplicateTrackError(ValueError):
+    """Raised by submit_track when the latent has already been submitted."""
+
+class MempoolFullError(RuntimeError):
+    """Raised by submit_track when the mempool is full and the submission cannot wait."""
+
+class TrackIndex:
+    """
+    Duplicate-latent index. Tracks still in flight are held in a set; minted
+    history is checked exactly against the ledger's track locations, so no
+    second copy of every hash is kept and there are no false rejections.
+    """
+
+    def __init__(self, history: Container[str]):
+        self.history = history
+        self.pending: set = set()
+
+    def __contains__(self, track_hash: str) -> bool:
+        return track_hash in self.pending or track_hash in self.history
+
+    def reserve(self, track_hash: str) -> bool:
+        """Claims a hash for an in-flight submission. Returns False if it is a duplicate."""
+        if track_hash in self:
+            return False
+        self.pending.add(track_hash)
+        return True
+
+    def release(self, track_hash: str):
+        """Drops a reservation whose submission failed, so it can be retried."""
+        self.pending.discard(track_hash)
+
+    def commit(self, track_hash: str):
+        """Drops the reservation of a track now recorded in history."""
+        self.pending.discard(track_hash)
+
+def __getattr__(name: str):
+    # BlockStore moved to block_store.py; keep zk_consensus_node.BlockStore working
+    if name == "BlockStore":
+        from block_store import BlockStore
+        return BlockStore
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class SubmissionTicket:
+    """Handle returned by submit_track; block_id is set once the track is minted."""
+    __slots__ = ("ticket_id", "agent_id", "track_hash", "proof", "block_id", "admitted_at")
+
+    def __init__(self, ticket_id: int, agent_id: str, track_hash: str, proof: "Future"):
+        self.ticket_id = ticket_id
+        self.agent_id = agent_id
+        self.track_hash = track_hash
+        self.proof = proof
+        self.block_id: Optional[int] = None
+        self.admitted_at = 0.0  # Monotonic time the proof entered the mempool
+
+    def __repr__(self) -> str:
+        return (f"SubmissionTicket(ticket_id={self.ticket_id}, agent_id={self.agent_id!r}, "
+                f"track_hash={self.track_hash!r}, block_id={self.block_id})")
+
+    def wait_for_proof(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        return self.proof.result(timeout)
+
 class ClawConsensusNetwork:
-    def __init__(self):
+    def __init__(self, proof_workers: int = 8, ledger_dir: Optional[str] = None,
+                 max_block_size: int = 5, max_block_latency: float = 2.0,
+                 max_mempool: int = 1000, reject_when_full: bool = False,
+                 submit_timeout: Optional[float] = 30.0):
         self.pending_tracks = []
-        self.verified_blocks = []
+
+        # Ledger: in memory, or persisted to an append-only block store
+        self.block_store = None
+        if ledger_dir:
+            from block_store import BlockStore
+            self.block_store = BlockStore(ledger_dir)
+        if self.block_store is not None:
+            self.verified_blocks = self.block_store.blocks
+            self.track_locations = self.block_store.track_locations
+        else:
+            self.verified_blocks = []
+            self.track_locations: Dict[str, Tuple[int, int]] = {}
+        self.track_index = TrackIndex(self.track_locations)
+        # Recently used block trees, for inclusion proofs; older ones are rebuilt on demand
+        self.block_trees: "OrderedDict[int, MerkleTree]" = OrderedDict()
+        self.block_tree_cache_size = 256
+
+        # Asynchronous mempool: proofs run on a worker pool, one generator
+        # per agent, and finished proofs are admitted in submission order.
+        # Generators of recently active agents are kept; others are rebuilt.
+        self.generators: "OrderedDict[str, ZKProofGenerator]" = OrderedDict()
+        self.generator_cache_size = 4096
+        from concurrent.futures import ThreadPoolExecutor
+        self._proof_pool = ThreadPoolExecutor(max_workers=proof_workers, thread_name_prefix="zk-proof")
+        self._inflight: Deque[SubmissionTicket] = deque()
+        self._pending_tickets: List[SubmissionTicket] = []
+        self._next_ticket_id = 1
+        self._lock = threading.RLock()
+        self._drained = threading.Condition(self._lock)
+
+        # Minting scheduler: a block is minted once max_block_size proofs are
+        # pending or the oldest has waited max_block_latency, whichever is
+        # first. The mempool (in flight + pending) is bounded; when full,
+        # submitters wait up to submit_timeout, or are rejected outright.
+        self.max_block_size = max_block_size
+        self.max_block_latency = max_block_latency
+        self.max_mempool = max_mempool
+        self.reject_when_full = reject_when_full
+        self.submit_timeout = submit_timeout
+        self._mint_wakeup = threading.Condition(self._lock)
+        self._space_available = threading.Condition(self._lock)
+        self._stopping = False
+        self._minter = threading.Thread(target=self._minter_loop, name="zk-minter", daemon=True)
+        self._minter.start()
         logging.info("ClawConsensusNetwork initialized. Awaiting tracks.")
 
-    def submit_track(self, agent_id: str, track_data: str):
-        """Submit a new AI generated track to the consensus mempool."""
-        logging.info(f"Track received from {agent_id}. Moving to mempool.")
-        
-        track_hash = hashlib.sha256(track_data.encode()).hexdigest()
-        zk_gen = ZKProofGenerator(agent_id)
-        proof = zk_gen.generate_proof(track_hash)
-        
-        self.pending_tracks.append({
-            "track_hash": track_hash,
-            "proof": proof
-        })
-        
-        if len(self.pending_tracks) >= 5:
-            self._mint_block()
+    def mempool_size(self) -> int:
+        with self._lock:
+            return len(self._inflight) + len(self.pending_tracks)
+
+    def _generator_for(self, agent_id: str) -> ZKProofGenerator:
+        generator = self.generators.get(agent_id)
+        if generator is None:
+            generator = self.generators[agent_id] = ZKProofGenerator(agent_id)
+            if len(self.generators) > self.generator_cache_size:
+                self.generators.popitem(last=False)  # In-flight proofs keep their own reference
+        else:
+            self.generators.move_to_end(agent_id)
+        return generator
+
+    def submit_track(self, agent_id: str, track_data: TrackSource) -> SubmissionTicket:
+        """
+        Submit a new AI generated track to the consensus mempool. Returns
+        without waiting for the proof; raises DuplicateTrackError if the
+        latent was already submitted. `track_data` may be the data itself,
+        a path (os.PathLike) or a binary file object, streamed when hashed.
+        A `str` is data; submit a rendered file's `str` path with submit_artifact.
+        """
+        return self._enqueue(agent_id, hash_artifact(track_data))
+
+    def submit_artifact(self, agent_id: str, path: Union[str, "os.PathLike[str]", BinaryIO]) -> SubmissionTicket:
+        """Like submit_track for a rendered file, with a plain `str` taken as its path."""
+        return self._enqueue(agent_id, hash_artifact_file(path))
+
+    def submit_tracks(self, submissions: Iterable[Tuple[str, TrackSource]],
+                      hash_workers: int = 4, paths: bool = False) -> List[Optional[SubmissionTicket]]:
+        """
+        Submits (agent_id, artifact) pairs, hashing the artifacts in parallel
+        and enqueueing them in the given order. Duplicates get None. With
+        `paths`, each artifact is a rendered file (a `str` is its path), as
+        with submit_artifact.
+        """
+        submissions = list(submissions)
+        track_hashes = hash_artifacts((source for _, source in submissions), hash_workers, paths)
+        tickets: List[Optional[SubmissionTicket]] = []
+        for (agent_id, _), track_hash in zip(submissions, track_hashes):
+            try:
+                tickets.append(self._enqueue(agent_id, track_hash))
+            except DuplicateTrackError:
+                tickets.append(None)
+        return tickets
+
+    def _enqueue(self, agent_id: str, track_hash: str) -> SubmissionTicket:
+        with self._lock:
+            if self._stopping:
+                raise MempoolFullError("Consensus network is shutting down")
+            if len(self._inflight) + len(self.pending_tracks) >= self.max_mempool:
+                if self.reject_when_full or not self._space_available.wait_for(
+                        lambda: self._stopping or len(self._inflight) + len(self.pending_tracks) < self.max_mempool,
+                        self.submit_timeout):
+                    logging.warning(f"Mempool full ({self.max_mempool}); rejecting track from {agent_id}.")
+                    raise MempoolFullError(f"Mempool is full ({self.max_mempool} tracks)")
+                if self._stopping:
+                    raise MempoolFullError("Consensus network is shutting down")
+            if not self.track_index.reserve(track_hash):
+                logging.warning(f"Duplicate latent from {agent_id} rejected: {track_hash[:16]}...")
+                raise DuplicateTrackError(f"Track {track_hash} has already been submitted")
+            logging.info(f"Track received from {agent_id}. Moving to mempool.")
+            generator = self._generator_for(agent_id)
+            try:
+                proof = self._proof_pool.submit(generator.generate_proof, track_hash)
+            except Exception:
+                self.track_index.release(track_hash)  # Never submitted, so it may be retried
+                raise
+            ticket = SubmissionTicket(self._next_ticket_id, agent_id, track_hash, proof)
+            self._next_ticket_id += 1
+            self._inflight.append(ticket)
+        ticket.proof.add_done_callback(lambda _: self._admit_proofs())
+        return ticket
+
+    def _admit_proofs(self):
+        """Moves finished proofs into the mempool, strictly in submission order."""
+        with self._lock:
+            while self._inflight and self._inflight[0].proof.done():
+                ticket = self._inflight.popleft()
+                try:
+                    proof = ticket.proof.result()
+                except Exception as e:
+                    logging.error(f"Proof generation failed for ticket #{ticket.ticket_id} ({ticket.agent_id}): {e}")
+                    self.track_index.release(ticket.track_hash)
+                    self._space_available.notify()
+                    continue
+
+                ticket.admitted_at = time.monotonic()
+                self.pending_tracks.append({
+                    "track_hash": ticket.track_hash,
+                    "proof": proof
+                })
+                self._pending_tickets.append(ticket)
+                if len(self.pending_tracks) == 1 or len(self.pending_tracks) >= self.max_block_size:
+                    self._mint_wakeup.notify()
+            if not self._inflight:
+                self._drained.notify_all()
+                self._mint_wakeup.notify()  # A stopping minter may be waiting on the last proof
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every submitted proof has been admitted. Returns False on timeout."""
+        with self._drained:
+            return self._drained.wait_for(lambda: not self._inflight, timeout)
+
+    def _minter_loop(self):
+        with self._lock:
+            while True:
+                timeout = None
+                if self.pending_tracks:
+                    deadline = self._pending_tickets[0].admitted_at + self.max_block_latency
+                    timeout = deadline - time.monotonic()
+                    if len(self.pending_tracks) >= self.max_block_size or timeout <= 0 or self._stopping:
+                        try:
+                            self._mint_block()
+                        except Exception as e:
+                            if self._stopping:
+                                logging.error(f"Block minting failed during shutdown: {e}; "
+                                              f"leaving {len(self.pending_tracks)} tracks pending.")
+                                return
+                            logging.error(f"Block minting failed: {e}")
+                            self._mint_wakeup.wait(1.0)  # Retry later rather than spin
+                        continue
+                elif self._stopping and not self._inflight:
+                    return
+                self._mint_wakeup.wait(timeout)
+
+    def close(self):
+        """
+        Stops accepting submissions (waiting submitters are rejected),
+        finishes outstanding proofs, mints whatever is pending, stops the
+        worker pool and the minter, and checkpoints the block store.
+        """
+        with self._lock:
+            self._stopping = True
+            self._mint_wakeup.notify()
+            self._space_available.notify_all()
+        self._proof_pool.shutdown(wait=True)
+        self.drain()
+        self._minter.join()
+        if self.block_store is not None:
+            self.block_store.close()
 
     def _mint_block(self):
-        """Mints a new block of verified tracks to the ledger."""
-        logging.info("Mempool full. Minting new consensus block...")
+        """Mints the oldest pending tracks (up to max_block_size) into a new block. Caller holds the lock."""
+        transactions = self.pending_tracks[:self.max_block_size]
+        tickets = self._pending_tickets[:self.max_block_size]
+        logging.info(f"Minting new consensus block with {len(transactions)} tracks...")
         
-        leaves = [t["track_hash"] for t in self.pending_tracks]
-        tree = MerkleTree(leaves)
+        block_id = len(self.verified_blocks) + 1
+        tree = MerkleTree()
+        for t in transactions:
+            index = tree.append(bytes.fromhex(t["track_hash"]))
+            if self.block_store is None:  # The store indexes tracks as it appends
+                self.track_locations.setdefault(t["track_hash"], (block_id, index))
+        self._cache_block_tree(block_id, tree)
         
         block = {
-            "block_id": len(self.verified_blocks) + 1,
+            "block_id": block_id,
             "merkle_root": tree.get_root(),
-            "transactions": self.pending_tracks,
+            "transactions": transactions,
             "timestamp": int(time.time())
         }
         
-        self.verified_blocks.append(block)
-        self.pending_tracks = []
+        if self.block_store is not None:
+            self.block_store.append(block)
+        else:
+            self.verified_blocks.append(block)
+        for t in transactions:
+            self.track_index.commit(t["track_hash"])
+        del self.pending_tracks[:len(transactions)]
+        del self._pending_tickets[:len(tickets)]
+        for ticket in tickets:
+            ticket.block_id = block_id
+        self._space_available.notify(len(transactions))
         logging.info(f"Block #{block['block_id']} minted successfully with Merkle Root: {block['merkle_root'][:16]}...")
 
+    def _cache_block_tree(self, block_id: int, tree: MerkleTree):
+        self.block_trees[block_id] = tree
+        self.block_trees.move_to_end(block_id)
+        while len(self.block_trees) > self.block_tree_cache_size:
+            self.block_trees.popitem(last=False)
+
+    def _block_tree(self, block_id: int) -> MerkleTree:
+        tree = self.block_trees.get(block_id)
+        if tree is None:
+            block = self.verified_blocks[block_id - 1]
+            tree = MerkleTree(bytes.fromhex(t["track_hash"]) for t in block["transactions"])
+        self._cache_block_tree(block_id, tree)
+        return tree
+
+    def find_block(self, track_hash: str) -> Optional[int]:
+        """Id of the block containing a minted track, or None."""
+        location = self.track_locations.get(track_hash)
+        return location[0] if location else None
+
+    def prove_track(self, track_hash: str) -> Optional[Dict[str, Any]]:
+        """Inclusion proof for a minted track, or None if it is not on the ledger."""
+        location = self.track_locations.get(track_hash)
+        if location is None:
+            return None
+        block_id, index = location
+        tree = self._block_tree(block_id)
+        return {
+            "block_id": block_id,
+            "leaf_index": index,
+            "merkle_root": tree.get_root(),
+            "proof": [(sibling.hex(), is_left) for sibling, is_left in tree.prove(index)]
+        }
+
+    def verify_track(self, track_hash: str, inclusion: Dict[str, Any]) -> bool:
+        """Checks an inclusion proof against the root recorded in its block."""
+        block_id = inclusion.get("block_id")
+        if not isinstance(block_id, int) or not 1 <= block_id <= len(self.verified_blocks):
+            return False
+        root = bytes.fromhex(self.verified_blocks[block_id - 1]["merkle_root"])
+        proof = [(bytes.fromhex(sibling), is_left) for sibling, is_left in inclusion["proof"]]
+        return MerkleTree.verify_proof(bytes.fromhex(track_hash), proof, root)
+
 if __name__ == "__main__":
-    
-    network = ClawConsensusNetwork()
+    import argparse
+    parser = argparse.ArgumentParser(description="ZK Neural Consensus Node")
+    parser.add_argument("--ledger-dir", type=str, default=os.environ.get("CLAW_LEDGER_DIR"),
+                        help="Directory of the persistent block log (in-memory ledger if omitted)")
+    args = parser.parse_args()
+
+    network = ClawConsensusNetwork(ledger_dir=args.ledger_dir)
     
     for i in range(12):
-        network.submit_track(f"AGENT_CORE_0x{i}", f"LATENT_AUDIO_DATA_STREAM_{i}_WAV")
+        try:
+            network.submit_track(f"AGENT_CORE_0x{i}", f"LATENT_AUDIO_DATA_STREAM_{i}_WAV")
+        except DuplicateTrackError:
+            continue  # Already on a persisted ledger from an earlier run
         time.sleep(0.1)
-        
+
+    network.close()
     print(f"Node sync complete. Current block height: {len(network.verified_blocks)}")
 